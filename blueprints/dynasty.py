@@ -209,8 +209,8 @@ def create_dynasty():
                         territories_per_province=4, map_width=900, map_height=700)
                     tm = TerritoryManager(db.session)
                     starting = Territory.query.filter_by(controller_dynasty_id=None).limit(6).all()
-                    for idx, terr in enumerate(starting):
-                        tm.assign_territory(terr.id, new_dynasty.id, is_capital=(idx == 0))
+                    tm.assign_territories([terr.id for terr in starting], new_dynasty.id,
+                                          starting[0].id if starting else None)
                     db.session.commit()
                     logger.info(
                         f"Generated starting map ({len(starting)} territories) "
@@ -22,7 +22,7 @@ def check_dynasty(dynasty_name=None, dynasty_id=None):
         # Find the dynasty
         dynasty = None
         if dynasty_id:
-            dynasty = DynastyDB.query.get(dynasty_id)
+            dynasty = db.session.get(DynastyDB, dynasty_id)
         elif dynasty_name:
             dynasty = DynastyDB.query.filter_by(name=dynasty_name).first()
         else:
@@ -44,7 +44,7 @@ def check_dynasty(dynasty_name=None, dynasty_id=None):
             print(f"Current Wealth: {dynasty.current_wealth}")
             
             # Get the founder
-            founder = PersonDB.query.get(dynasty.founder_person_db_id) if dynasty.founder_person_db_id else None
+            founder = db.session.get(PersonDB, dynasty.founder_person_db_id) if dynasty.founder_person_db_id else None
             if founder:
                 print(f"\nFounder: {founder.name} {founder.surname}")
                 print(f"Gender: {founder.gender}")
@@ -54,7 +54,7 @@ def check_dynasty(dynasty_name=None, dynasty_id=None):
                 
                 # Get founder's spouse
                 if founder.spouse_sim_id:
-                    spouse = PersonDB.query.get(founder.spouse_sim_id)
+                    spouse = db.session.get(PersonDB, founder.spouse_sim_id)
                     if spouse:
                         print(f"\nFounder's Spouse: {spouse.name} {spouse.surname}")
                         print(f"Birth Year: {spouse.birth_year}")
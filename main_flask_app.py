@@ -79,6 +79,18 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL',
                                                        f'sqlite:///{os.path.join(instance_path, "dynastysim.db")}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Recommended to disable
 
+# Connection pool: test connections on checkout so ones a database server
+# dropped while idle are replaced. Pool sizing and recycling only apply to
+# server databases (DATABASE_URL); SQLite keeps its default pool.
+engine_options = {'pool_pre_ping': True}
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    engine_options.update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        pool_recycle=1800,
+    )
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
 # Initialize SQLAlchemy with the Flask app
 db.init_app(app)
 
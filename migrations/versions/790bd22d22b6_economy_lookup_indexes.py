@@ -0,0 +1,35 @@
+"""economy lookup indexes
+
+Revision ID: 790bd22d22b6
+Revises: bf3ce6110890
+Create Date: 2026-10-17 10:12:41.308215
+
+Adds two composite indexes for economy read paths:
+  - ix_person_dynasty_death: person_db(dynasty_id, death_year) — living members
+  - ix_war_ongoing_pair: war(end_year, attacker_dynasty_id, defender_dynasty_id) —
+    covers the ongoing-war pair lookup used by the trade route war check
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '790bd22d22b6'
+down_revision = 'bf3ce6110890'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('person_db', schema=None) as batch_op:
+        batch_op.create_index('ix_person_dynasty_death', ['dynasty_id', 'death_year'], unique=False)
+
+    with op.batch_alter_table('war', schema=None) as batch_op:
+        batch_op.create_index('ix_war_ongoing_pair', ['end_year', 'attacker_dynasty_id', 'defender_dynasty_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('war', schema=None) as batch_op:
+        batch_op.drop_index('ix_war_ongoing_pair')
+
+    with op.batch_alter_table('person_db', schema=None) as batch_op:
+        batch_op.drop_index('ix_person_dynasty_death')
@@ -224,6 +224,12 @@ class PersonDB(db.Model):
     # SVG portrait generated by visualization/portrait_renderer.py
     portrait_svg = db.Column(db.Text, nullable=True)
 
+    # Composite index for the hot "living members of a dynasty" filter
+    # (dynasty_id with death_year IS NULL)
+    __table_args__ = (
+        db.Index('ix_person_dynasty_death', 'dynasty_id', 'death_year'),
+    )
+
     def get_titles(self) -> list:
         """Deserializes titles from JSON string."""
         return json.loads(self.titles_json or '[]')
@@ -1009,6 +1015,12 @@ class War(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     last_updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
+    # Covering index for the ongoing-war lookup (end_year IS NULL, reading
+    # the attacker/defender pair)
+    __table_args__ = (
+        db.Index('ix_war_ongoing_pair', 'end_year', 'attacker_dynasty_id', 'defender_dynasty_id'),
+    )
+    
     def calculate_war_score(self):
         """Calculate current war score based on battles and objectives."""
         # Base score from battles
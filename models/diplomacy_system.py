@@ -115,24 +115,32 @@ class DiplomacySystem:
             return "Unknown", 0
             
         score = relation.relation_score
+        return self.relation_status_for_score(score), score
+    
+    def relation_status_for_score(self, score: int) -> str:
+        """
+        Get the diplomatic status name for a relation score.
         
-        # Determine status based on score
+        Args:
+            score: Relation score
+            
+        Returns:
+            Status name
+        """
         if score >= 75:
-            status = "Allied"
+            return "Allied"
         elif score >= 50:
-            status = "Friendly"
+            return "Friendly"
         elif score >= 25:
-            status = "Cordial"
+            return "Cordial"
         elif score >= -25:
-            status = "Neutral"
+            return "Neutral"
         elif score >= -50:
-            status = "Unfriendly"
+            return "Unfriendly"
         elif score >= -75:
-            status = "Hostile"
+            return "Hostile"
         else:
-            status = "Nemesis"
-            
-        return status, score
+            return "Nemesis"
     
     def _generate_diplomatic_action_description(self, action_type: str, actor_name: str, target_name: str, is_target: bool = False) -> str:
         """
@@ -11,8 +11,13 @@ import random
 import math
 import datetime
 import json
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
 from typing import List, Dict, Tuple, Optional, Union, Any, Set
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session, joinedload, scoped_session
 from models.db_models import (
     db, DynastyDB, PersonDB, Territory, TerrainType, Settlement,
     Resource, ResourceType, TerritoryResource, Building, BuildingType,
@@ -20,6 +25,395 @@ from models.db_models import (
 )
 from models.map_system import TerritoryManager
 
+
+# Enum positions, used as array indices by the lookup tables and kernels.
+# Fixed at import time, so hot paths index these instead of rebuilding them.
+_RESOURCE_TYPES = tuple(ResourceType)
+_RESOURCE_INDEX = {resource_type: i for i, resource_type in enumerate(_RESOURCE_TYPES)}
+_TERRAIN_INDEX = {terrain_type: i for i, terrain_type in enumerate(TerrainType)}
+_BUILDING_INDEX = {building_type: i for i, building_type in enumerate(BuildingType)}
+_FOOD_I = _RESOURCE_INDEX[ResourceType.FOOD]
+_GOLD_I = _RESOURCE_INDEX[ResourceType.GOLD]
+
+# Gold cost of developing a territory from each level below the maximum (10):
+# a base cost of 100, 50% more expensive per level
+_DEVELOPMENT_COSTS = tuple(100 * (1.0 + level * 0.5) for level in range(10))
+
+# Tax and population growth rates for development levels missing from
+# base_tax_rates / population_growth_rates
+_DEFAULT_TAX_RATE = 0.05
+_DEFAULT_GROWTH_RATE = 0.01
+
+# Economic effects of each active treaty type: numbers are added to the
+# effect (which starts at 1.0), anything else replaces it
+_TREATY_EFFECTS = {
+    TreatyType.TRADE_AGREEMENT: {"trade_efficiency": 0.1},
+    TreatyType.MARKET_ACCESS: {"market_access": True},
+    TreatyType.RESOURCE_EXCHANGE: {"resource_exchange": True},
+    TreatyType.ECONOMIC_UNION: {"trade_efficiency": 0.2, "market_access": True, "resource_exchange": True},
+}
+
+# Default production bonuses of each building type: resource multipliers
+# plus non-resource effects such as "trade_efficiency"
+_BUILDING_PRODUCTION_BONUSES = {
+    BuildingType.FARM: {
+        ResourceType.FOOD: 1.5
+    },
+    BuildingType.MINE: {
+        ResourceType.IRON: 1.5,
+        ResourceType.STONE: 1.2,
+        ResourceType.GOLD: 0.8
+    },
+    BuildingType.LUMBER_CAMP: {
+        ResourceType.TIMBER: 1.8
+    },
+    BuildingType.WORKSHOP: {
+        ResourceType.GOLD: 1.2
+    },
+    BuildingType.MARKET: {
+        ResourceType.GOLD: 1.5,
+        "trade_efficiency": 0.2
+    },
+    BuildingType.PORT: {
+        ResourceType.GOLD: 1.3,
+        "trade_range": 2.0,
+        "trade_efficiency": 0.3
+    },
+    BuildingType.WAREHOUSE: {
+        "storage_capacity": 2.0,
+        "resource_decay": -0.5  # Reduces decay by 50%
+    },
+    BuildingType.TRADE_POST: {
+        "trade_efficiency": 0.4,
+        ResourceType.GOLD: 1.1
+    },
+    BuildingType.ROADS: {
+        "trade_efficiency": 0.3,
+        "movement_cost": -0.2  # Reduces movement cost by 20%
+    },
+    BuildingType.IRRIGATION: {
+        ResourceType.FOOD: 1.4
+    },
+    BuildingType.GUILD_HALL: {
+        ResourceType.GOLD: 1.3,
+        "production_efficiency": 0.2
+    },
+    BuildingType.BANK: {
+        ResourceType.GOLD: 1.5,
+        "interest_rate": 0.05  # 5% interest on treasury
+    }
+}
+
+
+@contextmanager
+def no_expire_on_commit(session):
+    """
+    Keep loaded objects populated across commits made inside the block.
+    
+    For turn-tick batches that read back only rows they have just written,
+    so the usual post-commit refresh SELECT is wasted. Not for single
+    player-facing actions: other objects in a shared session would keep
+    stale values. Accepts a Session or a scoped_session (e.g. db.session).
+    """
+    target = session() if isinstance(session, scoped_session) else session
+    previous = target.expire_on_commit
+    target.expire_on_commit = False
+    try:
+        yield session
+    finally:
+        target.expire_on_commit = previous
+
+
+def _vector_to_dict(values: np.ndarray, present: np.ndarray, keys: tuple) -> Dict[Any, float]:
+    """Convert a resource vector back to a dict holding only the present columns."""
+    return {keys[i]: float(values[i]) for i in np.flatnonzero(present)}
+
+
+def _group_by(rows, key) -> Dict[Any, list]:
+    """Group rows (any iterable, e.g. a query) into lists by key(row)."""
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[key(row)].append(row)
+    return grouped
+
+
+def _freeze_table(table: Dict[Any, Dict[Any, float]]) -> Tuple:
+    """Convert a nested lookup table into nested tuples so it can key a cache."""
+    return tuple((key, tuple(row.items())) for key, row in table.items())
+
+
+def _effects_json(bonuses: Dict[Any, float]) -> str:
+    """Serialize a building's resource multipliers as stored in Building.effects_json."""
+    return json.dumps({resource_type.value: bonuses.get(resource_type, 0) for resource_type in _RESOURCE_TYPES})
+
+
+@lru_cache(maxsize=None)
+def effects_json_for(building_type: BuildingType) -> str:
+    """
+    Get the effects_json for a new building of a type under the default
+    production bonuses.
+    
+    Cached per building type, so callers outside the EconomySystem (e.g.
+    project completion) need not build one to look it up.
+    """
+    return _effects_json(_BUILDING_PRODUCTION_BONUSES.get(building_type, {}))
+
+
+@lru_cache(maxsize=None)
+def _lookup_tables(terrain_production_rates: Tuple, building_production_bonuses: Tuple,
+                   resource_consumption_per_capita: Tuple,
+                   building_maintenance_costs: Tuple,
+                   base_tax_rates: Tuple,
+                   population_growth_rates: Tuple) -> Dict[str, Any]:
+    """
+    Build the array forms of the EconomySystem tables from their frozen
+    (tuple) forms.
+    
+    Cached, so the arrays are built once per distinct set of tables rather
+    than once per EconomySystem. They are shared and therefore read-only.
+    
+    Returns:
+        Dictionary mapping EconomySystem attribute names to tables
+    """
+    resource_types = _RESOURCE_TYPES
+    resource_index = _RESOURCE_INDEX
+    terrain_index = _TERRAIN_INDEX
+    building_index = _BUILDING_INDEX
+    
+    # Base production per development level; the mask marks resources a
+    # terrain produces at all (they are reported even when zero)
+    terrain_prod = np.zeros((len(terrain_index), len(resource_types)), dtype=np.float64)
+    terrain_mask = np.zeros(terrain_prod.shape, dtype=bool)
+    for terrain_type, rates in terrain_production_rates:
+        for resource_type, base_rate in rates:
+            terrain_prod[terrain_index[terrain_type], resource_index[resource_type]] = base_rate
+            terrain_mask[terrain_index[terrain_type], resource_index[resource_type]] = True
+    
+    # Terrain production rates normalized to a 0-1 scale, as reported by
+    # integrate_with_map_system
+    terrain_efficiency = {
+        terrain_type: {resource_type: base_rate / 2.0 for resource_type, base_rate in rates}
+        for terrain_type, rates in terrain_production_rates
+    }
+    
+    # Resource multipliers of each building type, without the non-resource
+    # effects (e.g. "trade_efficiency") that share its bonus table
+    building_resource_bonuses = {building_type: {} for building_type in building_index}
+    for building_type, bonuses in building_production_bonuses:
+        building_resource_bonuses[building_type] = {
+            resource_type: bonus for resource_type, bonus in bonuses
+            if isinstance(resource_type, ResourceType)
+        }
+    
+    # Production multipliers; 1.0 where a building has no effect
+    building_bonus = np.ones((len(building_index), len(resource_types)), dtype=np.float64)
+    for building_type, bonuses in building_resource_bonuses.items():
+        for resource_type, bonus in bonuses.items():
+            building_bonus[building_index[building_type], resource_index[resource_type]] = bonus
+    
+    # effects_json stored on each new Building of a type
+    effects_json_by_type = {
+        building_type: _effects_json(bonuses)
+        for building_type, bonuses in building_resource_bonuses.items()
+    }
+    
+    # Consumption columns: every resource type, then the building
+    # maintenance keys (plain strings such as "gold")
+    maintenance_keys = tuple(dict.fromkeys(
+        key for _, costs in building_maintenance_costs for key, _ in costs
+    ))
+    consumption_keys = resource_types + maintenance_keys
+    consumption_index = {key: i for i, key in enumerate(consumption_keys)}
+    
+    per_capita = np.zeros(len(consumption_keys), dtype=np.float64)
+    per_capita_mask = np.zeros(len(consumption_keys), dtype=bool)
+    for resource_type, amount in resource_consumption_per_capita:
+        per_capita[consumption_index[resource_type]] = amount
+        per_capita_mask[consumption_index[resource_type]] = True
+    
+    building_maintenance = np.zeros((len(building_index), len(consumption_keys)), dtype=np.float64)
+    building_maintenance_mask = np.zeros(building_maintenance.shape, dtype=bool)
+    for building_type, costs in building_maintenance_costs:
+        for key, amount in costs:
+            building_maintenance[building_index[building_type], consumption_index[key]] = amount
+            building_maintenance_mask[building_index[building_type], consumption_index[key]] = True
+    
+    # Tax and growth rates by development level; levels missing from a
+    # table get the default rate
+    tax_rate_by_level = np.full(max(dict(base_tax_rates), default=0) + 1, _DEFAULT_TAX_RATE, dtype=np.float64)
+    for level, rate in base_tax_rates:
+        tax_rate_by_level[level] = rate
+    growth_by_level = np.full(max(dict(population_growth_rates), default=0) + 1, _DEFAULT_GROWTH_RATE,
+                              dtype=np.float64)
+    for level, rate in population_growth_rates:
+        growth_by_level[level] = rate
+    
+    for array in (terrain_prod, terrain_mask, building_bonus, per_capita, per_capita_mask,
+                  building_maintenance, building_maintenance_mask, tax_rate_by_level, growth_by_level):
+        array.setflags(write=False)
+    
+    return {
+        "_resource_types": resource_types,
+        "_resource_index": resource_index,
+        "_terrain_index": terrain_index,
+        "_building_index": building_index,
+        "_terrain_prod": terrain_prod,
+        "_terrain_mask": terrain_mask,
+        "_terrain_efficiency": terrain_efficiency,
+        "_building_bonus": building_bonus,
+        "_building_resource_bonuses": building_resource_bonuses,
+        "_effects_json_by_type": effects_json_by_type,
+        "_maintenance_keys": maintenance_keys,
+        "_consumption_keys": consumption_keys,
+        "_per_capita": per_capita,
+        "_per_capita_mask": per_capita_mask,
+        "_building_maintenance": building_maintenance,
+        "_building_maintenance_mask": building_maintenance_mask,
+        "_tax_rate_by_level": tax_rate_by_level,
+        "_growth_by_level": growth_by_level
+    }
+
+
+def _production_kernel(terrain_ids: np.ndarray, dev_levels: np.ndarray, populations: np.ndarray,
+                       stewardship: np.ndarray, resource_owner: np.ndarray, resource_ids: np.ndarray,
+                       resource_amounts: np.ndarray, building_owner: np.ndarray, building_ids: np.ndarray,
+                       terrain_prod: np.ndarray, terrain_mask: np.ndarray,
+                       building_bonus: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute production for a batch of territories.
+    
+    Per-territory inputs are parallel arrays; resource deposits and
+    buildings are flat arrays whose *_owner entries give the territory row.
+    
+    Returns:
+        Tuple of (territories x resources production, mask of the resources
+        each territory reports)
+    """
+    # Base production from terrain, scaled by development level
+    production = terrain_prod[terrain_ids] * dev_levels[:, None]
+    present = terrain_mask[terrain_ids]
+    
+    # Production from territory resources
+    np.add.at(production, (resource_owner, resource_ids), resource_amounts)
+    present[resource_owner, resource_ids] = True
+    
+    # Building bonuses, applied in building order; resources with no base
+    # production stay at zero
+    np.multiply.at(production, building_owner, building_bonus[building_ids])
+    
+    # Population modifier (capped at 1.0) and governor stewardship (+1% per point)
+    production *= np.minimum(1.0, populations / 1000)[:, None]
+    production *= (1.0 + stewardship * 0.01)[:, None]
+    
+    return production, present
+
+
+def _consumption_kernel(populations: np.ndarray, building_owner: np.ndarray, building_ids: np.ndarray,
+                        unit_owner: np.ndarray, unit_food: np.ndarray, unit_gold: np.ndarray,
+                        per_capita: np.ndarray, per_capita_mask: np.ndarray,
+                        building_maintenance: np.ndarray, building_maintenance_mask: np.ndarray,
+                        food_i: int, gold_i: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute consumption for a batch of territories (same layout as
+    _production_kernel, columns as EconomySystem._consumption_keys).
+    
+    Returns:
+        Tuple of (territories x columns consumption, mask of the columns
+        each territory reports)
+    """
+    # Population-based consumption, scaled by 1000
+    consumption = populations[:, None] * per_capita / 1000
+    present = np.tile(per_capita_mask, (len(populations), 1))
+    
+    # Building maintenance
+    np.add.at(consumption, building_owner, building_maintenance[building_ids])
+    np.logical_or.at(present, building_owner, building_maintenance_mask[building_ids])
+    
+    # Military units consume food and gold
+    np.add.at(consumption[:, food_i], unit_owner, unit_food)
+    np.add.at(consumption[:, gold_i], unit_owner, unit_gold)
+    present[unit_owner, food_i] = True
+    present[unit_owner, gold_i] = True
+    
+    return consumption, present
+
+
+def _aggregate_kernel(production: np.ndarray, production_present: np.ndarray,
+                      consumption: np.ndarray, consumption_present: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Reduce per-territory production and consumption (layouts as returned by
+    _production_kernel and _consumption_kernel) to dynasty totals.
+    
+    Net production is over the consumption columns, whose leading columns
+    are the resource types.
+    
+    Returns:
+        Tuple of (total production, its mask, total consumption, its mask,
+        net production, its mask)
+    """
+    n_resources = production.shape[1]
+    total_production = production.sum(axis=0)
+    total_production_present = production_present.any(axis=0)
+    total_consumption = consumption.sum(axis=0)
+    total_consumption_present = consumption_present.any(axis=0)
+    
+    net = -total_consumption
+    net[:n_resources] += total_production
+    net_present = total_consumption_present.copy()
+    net_present[:n_resources] |= total_production_present
+    
+    return (total_production, total_production_present, total_consumption, total_consumption_present,
+            net, net_present)
+
+
+def _rate_by_level(by_level: np.ndarray, levels: np.ndarray, default: float) -> np.ndarray:
+    """Look up per-level rates; levels outside the table get the default."""
+    known_level = (levels >= 0) & (levels < len(by_level))
+    known_rate = by_level[np.clip(levels, 0, len(by_level) - 1)] if len(by_level) else default
+    return np.where(known_level, known_rate, default)
+
+
+def _tax_kernel(base_tax: np.ndarray, dev_levels: np.ndarray, populations: np.ndarray,
+                stewardship_bonus: np.ndarray, settlement_multipliers: np.ndarray,
+                tax_rate_by_level: np.ndarray) -> np.ndarray:
+    """
+    Compute tax income for a batch of territories.
+    
+    Returns:
+        Tax income in gold per territory, before the monarch's trait modifier
+    """
+    # Base tax, population modifier (capped at 2.0) and the tax rate for the
+    # development level
+    tax_income = base_tax * dev_levels
+    tax_income = tax_income * np.minimum(2.0, populations / 1000)
+    tax_income *= _rate_by_level(tax_rate_by_level, dev_levels, _DEFAULT_TAX_RATE)
+    
+    # Governor (+2% per stewardship point) and settlement bonuses; both are
+    # 1.0 where absent
+    tax_income *= stewardship_bonus
+    tax_income *= settlement_multipliers
+    return tax_income
+
+
+def _growth_kernel(populations: np.ndarray, dev_levels: np.ndarray, food_production: np.ndarray,
+                   food_consumption: np.ndarray, growth_by_level: np.ndarray) -> np.ndarray:
+    """
+    Grow a batch of territory populations by one turn.
+    
+    Returns:
+        New populations (at least 100 each)
+    """
+    growth_rate = _rate_by_level(growth_by_level, dev_levels, _DEFAULT_GROWTH_RATE)
+    
+    # Food shortage reduces growth or causes decline (can go negative)
+    shortage = food_production < food_consumption
+    food_ratio = np.divide(food_production, food_consumption,
+                           out=np.zeros_like(food_production), where=shortage)
+    growth_rate = np.where(shortage, growth_rate * (food_ratio - 0.5), growth_rate)
+    
+    return np.maximum(100, (populations * (1 + growth_rate)).astype(np.int64))
+
+
 class EconomySystem:
     """
     Core economy system that handles resource production and consumption,
@@ -92,52 +486,7 @@ class EconomySystem:
         
         # Building production bonuses
         self.building_production_bonuses = {
-            BuildingType.FARM: {
-                ResourceType.FOOD: 1.5
-            },
-            BuildingType.MINE: {
-                ResourceType.IRON: 1.5,
-                ResourceType.STONE: 1.2,
-                ResourceType.GOLD: 0.8
-            },
-            BuildingType.LUMBER_CAMP: {
-                ResourceType.TIMBER: 1.8
-            },
-            BuildingType.WORKSHOP: {
-                ResourceType.GOLD: 1.2
-            },
-            BuildingType.MARKET: {
-                ResourceType.GOLD: 1.5,
-                "trade_efficiency": 0.2
-            },
-            BuildingType.PORT: {
-                ResourceType.GOLD: 1.3,
-                "trade_range": 2.0,
-                "trade_efficiency": 0.3
-            },
-            BuildingType.WAREHOUSE: {
-                "storage_capacity": 2.0,
-                "resource_decay": -0.5  # Reduces decay by 50%
-            },
-            BuildingType.TRADE_POST: {
-                "trade_efficiency": 0.4,
-                ResourceType.GOLD: 1.1
-            },
-            BuildingType.ROADS: {
-                "trade_efficiency": 0.3,
-                "movement_cost": -0.2  # Reduces movement cost by 20%
-            },
-            BuildingType.IRRIGATION: {
-                ResourceType.FOOD: 1.4
-            },
-            BuildingType.GUILD_HALL: {
-                ResourceType.GOLD: 1.3,
-                "production_efficiency": 0.2
-            },
-            BuildingType.BANK: {
-                ResourceType.GOLD: 1.5,
-                "interest_rate": 0.05  # 5% interest on treasury
-            }
+            building_type: dict(bonuses) for building_type, bonuses in _BUILDING_PRODUCTION_BONUSES.items()
         }
         
         # Building construction costs
@@ -269,6 +618,12 @@ class EconomySystem:
             10: 0.15  # 15% for level 10
         }
         
+        # Tax multiplier per settlement of each type
+        self.settlement_tax_multipliers = {
+            "city": 1.5,  # Cities provide 50% more tax
+            "town": 1.2   # Towns provide 20% more tax
+        }
+        
         # Population growth rates by development level
         self.population_growth_rates = {
             1: 0.01,  # 1% for level 1
@@ -291,22 +646,178 @@ class EconomySystem:
             ResourceType.IRON: 0.02
         }
         
-        # Global market prices (base values)
-        self.global_market_prices = {}
+        # Array forms of the tables above for the production calculation
+        self._build_lookup_tables()
+        
+        # Generator for trade and market fluctuations (see _get_rng)
+        self._rng = None
+        
+        # Economy totals keyed by dynasty ID, as (inputs key, totals, net
+        # production vector) (see _economy_summary)
+        self._econ_cache = {}
+        
+        # Nesting depth of batch() blocks; mutations only flush while > 0
+        self._batch_depth = 0
+        
+        # (attacker, defender) pairs of ongoing wars, kept for the duration
+        # of a batch() block (see _active_war_pairs)
+        self._war_pairs = None
+        
+        # Global market, stored as parallel arrays indexed by position in
+        # _market_types (see _initialize_global_market)
         self._initialize_global_market()
     
+    def _build_lookup_tables(self):
+        """
+        Encode the terrain and building tables as arrays indexed by enum position.
+        
+        The arrays are shared by every EconomySystem built from the same
+        tables (see _lookup_tables).
+        """
+        tables = _lookup_tables(
+            _freeze_table(self.terrain_production_rates),
+            _freeze_table(self.building_production_bonuses),
+            tuple(self.resource_consumption_per_capita.items()),
+            _freeze_table(self.building_maintenance_costs),
+            tuple(self.base_tax_rates.items()),
+            tuple(self.population_growth_rates.items())
+        )
+        for name, value in tables.items():
+            setattr(self, name, value)
+    
     def _initialize_global_market(self):
         """Initialize the global market with base prices for all resources."""
-        resources = self.session.query(Resource).all()
-        
-        for resource in resources:
-            self.global_market_prices[resource.resource_type] = {
-                "base_price": resource.base_value,
-                "current_price": resource.base_value,
-                "supply": 0,
-                "demand": 0,
-                "volatility": resource.volatility
+        rows = self.session.query(
+            Resource.resource_type, Resource.base_value, Resource.volatility
+        ).all()
+        
+        # One entry per resource type; a later row wins, as the old dict did
+        market = {resource_type: (base_value, volatility) for resource_type, base_value, volatility in rows}
+        
+        self._market_types = list(market.keys())
+        self._market_index = {resource_type: i for i, resource_type in enumerate(self._market_types)}
+        self._market_base = np.array([v[0] for v in market.values()], dtype=np.float64)
+        self._market_current = self._market_base.copy()
+        self._market_volatility = np.array(
+            [v[1] if v[1] is not None else 0.1 for v in market.values()], dtype=np.float64
+        )
+        self._market_supply = np.zeros(len(self._market_types), dtype=np.float64)
+        self._market_demand = np.zeros(len(self._market_types), dtype=np.float64)
+    
+    @property
+    def global_market_prices(self) -> Dict[ResourceType, Dict[str, float]]:
+        """Read-only view of the global market keyed by resource type."""
+        return {
+            resource_type: {
+                "base_price": float(self._market_base[i]),
+                "current_price": float(self._market_current[i]),
+                "supply": float(self._market_supply[i]),
+                "demand": float(self._market_demand[i]),
+                "volatility": float(self._market_volatility[i])
             }
+            for i, resource_type in enumerate(self._market_types)
+        }
+    
+    def get_market_price(self, resource_type: ResourceType, default: Optional[float] = None) -> Optional[float]:
+        """
+        Get the current market price of a resource.
+        
+        Args:
+            resource_type: Type of resource
+            default: Value returned if the resource is not traded on the market
+            
+        Returns:
+            Current price, or default
+        """
+        i = self._market_index.get(resource_type)
+        if i is None:
+            return default
+        return float(self._market_current[i])
+    
+    def _resources_by_territory(self, territory_ids: List[int]) -> Dict[int, List[Tuple[TerritoryResource, ResourceType]]]:
+        """Fetch territory resources with their resource type, grouped by territory."""
+        if not territory_ids:
+            return defaultdict(list)
+        query = self.session.query(TerritoryResource, Resource.resource_type).join(
+            Resource, TerritoryResource.resource_id == Resource.id
+        ).filter(
+            TerritoryResource.territory_id.in_(territory_ids)
+        ).order_by(TerritoryResource.id)
+        return _group_by(query, lambda row: row[0].territory_id)
+    
+    def _buildings_by_territory(self, territory_ids: List[int]) -> Dict[int, List[Building]]:
+        """Fetch buildings grouped by territory."""
+        if not territory_ids:
+            return defaultdict(list)
+        query = self.session.query(Building).filter(
+            Building.territory_id.in_(territory_ids)
+        ).order_by(Building.id)
+        return _group_by(query, lambda building: building.territory_id)
+    
+    def _settlement_multipliers(self, territory_ids: List[int]) -> Dict[int, float]:
+        """Fold each territory's settlements into a single tax multiplier.
+        
+        One grouped count query replaces loading every Settlement row;
+        territories without taxed settlements are absent (multiplier 1.0).
+        """
+        multipliers = {}
+        if not territory_ids:
+            return multipliers
+        counts = self.session.query(
+            Settlement.territory_id, Settlement.settlement_type, func.count(Settlement.id)
+        ).filter(
+            Settlement.territory_id.in_(territory_ids),
+            Settlement.settlement_type.in_(list(self.settlement_tax_multipliers))
+        ).group_by(
+            Settlement.territory_id, Settlement.settlement_type
+        ).all()
+        for territory_id, settlement_type, count in counts:
+            multiplier = multipliers.get(territory_id, 1.0)
+            multipliers[territory_id] = multiplier * self.settlement_tax_multipliers[settlement_type] ** count
+        return multipliers
+    
+    def _units_by_territory(self, territory_ids: List[int]) -> Dict[int, List[MilitaryUnit]]:
+        """Fetch military units present in each territory."""
+        if not territory_ids:
+            return defaultdict(list)
+        query = self.session.query(MilitaryUnit).filter(
+            MilitaryUnit.territory_id.in_(territory_ids)
+        ).order_by(MilitaryUnit.id)
+        return _group_by(query, lambda unit: unit.territory_id)
+    
+    def _governors_by_id(self, territories: List[Territory]) -> Dict[int, PersonDB]:
+        """Fetch the governors of the given territories, keyed by person ID."""
+        governor_ids = {territory.governor_id for territory in territories if territory.governor_id}
+        if not governor_ids:
+            return {}
+        governors = self.session.query(PersonDB).filter(PersonDB.id.in_(governor_ids)).all()
+        return {governor.id: governor for governor in governors}
+    
+    def _load_dynasty_bundle(self, dynasty_id: int) -> Dict[str, Any]:
+        """
+        Load a dynasty's territories together with everything the economy
+        calculations read for them, using one query per table.
+        
+        Args:
+            dynasty_id: ID of the dynasty
+            
+        Returns:
+            Dictionary with the territories and their related rows grouped by
+            territory ID (governors keyed by person ID, settlements folded
+            into a tax multiplier)
+        """
+        territories = self.session.query(Territory).filter_by(controller_dynasty_id=dynasty_id).all()
+        territory_ids = [territory.id for territory in territories]
+        
+        return {
+            "territories": territories,
+            "resources": self._resources_by_territory(territory_ids),
+            "buildings": self._buildings_by_territory(territory_ids),
+            "settlement_multipliers": self._settlement_multipliers(territory_ids),
+            "units": self._units_by_territory(territory_ids),
+            "governors": self._governors_by_id(territories),
+            "monarch_traits": self._get_controller_monarch_traits(territories[0]) if territories else []
+        }
     
     def calculate_territory_production(self, territory_id: int) -> Dict[ResourceType, float]:
         """
@@ -322,56 +833,53 @@ class EconomySystem:
         if not territory:
             return {}
         
-        production = {}
-        
-        # Get base production from terrain
-        terrain_production = self.terrain_production_rates.get(territory.terrain_type, {})
-        for resource_type, base_rate in terrain_production.items():
-            production[resource_type] = base_rate * territory.development_level
-        
-        # Get production from territory resources
-        territory_resources = self.session.query(TerritoryResource).filter_by(territory_id=territory_id).all()
-        for tr in territory_resources:
-            resource = self.session.get(Resource, tr.resource_id)
-            if resource:
-                resource_type = resource.resource_type
-                base_production = tr.base_production * (1.0 - tr.current_depletion)
-                quality_modifier = tr.quality
-                
-                if resource_type in production:
-                    production[resource_type] += base_production * quality_modifier
-                else:
-                    production[resource_type] = base_production * quality_modifier
+        production, present = self._production_matrix(
+            [territory],
+            self._resources_by_territory([territory_id]),
+            self._buildings_by_territory([territory_id]),
+            self._governors_by_id([territory])
+        )
+        return _vector_to_dict(production[0], present[0], self._resource_types)
+    
+    def _production_matrix(self, territories: List[Territory],
+                           resources: Dict[int, List[Tuple[TerritoryResource, ResourceType]]],
+                           buildings: Dict[int, List[Building]],
+                           governors: Dict[int, PersonDB]) -> Tuple[np.ndarray, np.ndarray]:
+        """Flatten already-loaded rows into arrays and run _production_kernel."""
+        resource_owner, resource_ids, resource_amounts = [], [], []
+        building_owner, building_ids = [], []
+        
+        for i, territory in enumerate(territories):
+            for tr, resource_type in resources.get(territory.id, ()):
+                resource_owner.append(i)
+                resource_ids.append(_RESOURCE_INDEX[resource_type])
+                resource_amounts.append(tr.base_production * (1.0 - tr.current_depletion) * tr.quality)
+            
+            # Buildings in poor condition provide no bonus
+            for building in buildings.get(territory.id, ()):
+                if building.condition >= 0.5:
+                    building_owner.append(i)
+                    building_ids.append(_BUILDING_INDEX[building.building_type])
         
-        # Apply building bonuses
-        buildings = self.session.query(Building).filter_by(territory_id=territory_id).all()
-        for building in buildings:
-            if building.condition < 0.5:  # Buildings in poor condition provide reduced bonuses
-                continue
-                
-            bonuses = self.building_production_bonuses.get(building.building_type, {})
-            for resource_type, bonus in bonuses.items():
-                if isinstance(resource_type, ResourceType):
-                    if resource_type in production:
-                        production[resource_type] *= bonus
-                    else:
-                        # Only apply bonus if there's a base production to modify
-                        pass
-        
-        # Apply population modifier
-        population_modifier = min(1.0, territory.population / 1000)  # Cap at 1.0
-        for resource_type in production:
-            production[resource_type] *= population_modifier
-        
-        # Apply governor bonus if present
-        if territory.governor_id:
-            governor = self.session.get(PersonDB, territory.governor_id)
-            if governor:
-                stewardship_bonus = 1.0 + (governor.stewardship_skill * 0.01)  # +1% per point
-                for resource_type in production:
-                    production[resource_type] *= stewardship_bonus
-        
-        return production
+        stewardship = []
+        for territory in territories:
+            governor = governors.get(territory.governor_id)
+            stewardship.append(governor.stewardship_skill if governor else 0)
+        
+        return _production_kernel(
+            np.array([_TERRAIN_INDEX[t.terrain_type] for t in territories], dtype=np.intp),
+            np.array([t.development_level for t in territories], dtype=np.float64),
+            np.array([t.population for t in territories], dtype=np.float64),
+            np.array(stewardship, dtype=np.float64),
+            np.array(resource_owner, dtype=np.intp),
+            np.array(resource_ids, dtype=np.intp),
+            np.array(resource_amounts, dtype=np.float64),
+            np.array(building_owner, dtype=np.intp),
+            np.array(building_ids, dtype=np.intp),
+            self._terrain_prod,
+            self._terrain_mask,
+            self._building_bonus
+        )
     
     def calculate_territory_consumption(self, territory_id: int) -> Dict[ResourceType, float]:
         """
@@ -387,37 +895,44 @@ class EconomySystem:
         if not territory:
             return {}
         
-        consumption = {}
-        
-        # Population-based consumption
-        for resource_type, per_capita in self.resource_consumption_per_capita.items():
-            consumption[resource_type] = territory.population * per_capita / 1000  # Scale by 1000
-        
-        # Building maintenance consumption
-        buildings = self.session.query(Building).filter_by(territory_id=territory_id).all()
-        for building in buildings:
-            maintenance = self.building_maintenance_costs.get(building.building_type, {})
-            for resource_type, amount in maintenance.items():
-                if resource_type in consumption:
-                    consumption[resource_type] += amount
-                else:
-                    consumption[resource_type] = amount
-        
-        # Military unit consumption
-        military_units = territory.units_present
-        for unit in military_units:
-            # Assuming military units consume food and gold
-            if ResourceType.FOOD in consumption:
-                consumption[ResourceType.FOOD] += unit.food_consumption
-            else:
-                consumption[ResourceType.FOOD] = unit.food_consumption
-                
-            if ResourceType.GOLD in consumption:
-                consumption[ResourceType.GOLD] += unit.maintenance_cost
-            else:
-                consumption[ResourceType.GOLD] = unit.maintenance_cost
-        
-        return consumption
+        consumption, present = self._consumption_matrix(
+            [territory],
+            self._buildings_by_territory([territory_id]),
+            self._units_by_territory([territory_id])
+        )
+        return _vector_to_dict(consumption[0], present[0], self._consumption_keys)
+    
+    def _consumption_matrix(self, territories: List[Territory],
+                            buildings: Dict[int, List[Building]],
+                            units: Dict[int, List[MilitaryUnit]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Flatten already-loaded rows into arrays and run _consumption_kernel."""
+        building_owner, building_ids = [], []
+        unit_owner, unit_food, unit_gold = [], [], []
+        
+        for i, territory in enumerate(territories):
+            for building in buildings.get(territory.id, ()):
+                building_owner.append(i)
+                building_ids.append(_BUILDING_INDEX[building.building_type])
+            
+            for unit in units.get(territory.id, ()):
+                unit_owner.append(i)
+                unit_food.append(unit.food_consumption)
+                unit_gold.append(unit.maintenance_cost)
+        
+        return _consumption_kernel(
+            np.array([t.population for t in territories], dtype=np.float64),
+            np.array(building_owner, dtype=np.intp),
+            np.array(building_ids, dtype=np.intp),
+            np.array(unit_owner, dtype=np.intp),
+            np.array(unit_food, dtype=np.float64),
+            np.array(unit_gold, dtype=np.float64),
+            self._per_capita,
+            self._per_capita_mask,
+            self._building_maintenance,
+            self._building_maintenance_mask,
+            _FOOD_I,
+            _GOLD_I
+        )
     
     def calculate_territory_tax_income(self, territory_id: int) -> float:
         """
@@ -433,31 +948,30 @@ class EconomySystem:
         if not territory:
             return 0.0
         
-        # Base tax from territory
-        base_tax = territory.base_tax * territory.development_level
-        
-        # Apply population modifier
-        population_modifier = min(2.0, territory.population / 1000)  # Cap at 2.0
-        tax_income = base_tax * population_modifier
-        
-        # Apply tax rate based on development level
-        tax_rate = self.base_tax_rates.get(territory.development_level, 0.05)
-        tax_income *= tax_rate
-        
-        # Apply governor bonus if present
-        if territory.governor_id:
-            governor = self.session.get(PersonDB, territory.governor_id)
-            if governor:
-                stewardship_bonus = 1.0 + (governor.stewardship_skill * 0.02)  # +2% per point
-                tax_income *= stewardship_bonus
-        
-        # Apply settlement bonus
-        settlements = self.session.query(Settlement).filter_by(territory_id=territory_id).all()
-        for settlement in settlements:
-            if settlement.settlement_type == "city":
-                tax_income *= 1.5  # Cities provide 50% more tax
-            elif settlement.settlement_type == "town":
-                tax_income *= 1.2  # Towns provide 20% more tax
+        tax_income = self._tax_vector(
+            [territory],
+            self._governors_by_id([territory]),
+            self._settlement_multipliers([territory_id]),
+            self._get_controller_monarch_traits(territory)
+        )
+        return float(tax_income[0])
+    
+    def _tax_vector(self, territories: List[Territory], governors: Dict[int, PersonDB],
+                    settlement_multipliers: Dict[int, float], monarch_traits: list) -> np.ndarray:
+        """Flatten already-loaded rows into arrays and run _tax_kernel."""
+        tax_income = _tax_kernel(
+            np.array([territory.base_tax for territory in territories], dtype=np.float64),
+            np.array([territory.development_level for territory in territories], dtype=np.int64),
+            np.array([territory.population for territory in territories], dtype=np.float64),
+            np.array([
+                1.0 + governors[territory.governor_id].stewardship_skill * 0.02
+                if territory.governor_id in governors else 1.0
+                for territory in territories
+            ], dtype=np.float64),
+            np.array([settlement_multipliers.get(territory.id, 1.0) for territory in territories],
+                     dtype=np.float64),
+            self._tax_rate_by_level
+        )
 
         # Apply trait modifier of the controller dynasty's living monarch.
         # Lazy import: trait_effects is provided by another agent and may be
@@ -466,12 +980,11 @@ class EconomySystem:
         # breaking turn processing.
         try:
             from models.trait_effects import tax_modifier
-            monarch_traits = self._get_controller_monarch_traits(territory)
             tax_income *= tax_modifier(monarch_traits)
         except ImportError:
             pass
 
-        return float(tax_income)
+        return tax_income
 
     def _get_controller_monarch_traits(self, territory) -> list:
         """
@@ -495,76 +1008,92 @@ class EconomySystem:
         except Exception:
             return []
 
-    def calculate_dynasty_economy(self, dynasty_id: int) -> Dict[str, Any]:
+    def calculate_dynasty_economy(self, dynasty_id: int, include_detail: bool = True) -> Dict[str, Any]:
         """
         Calculate the overall economy for a dynasty.
         
         Args:
             dynasty_id: ID of the dynasty
+            include_detail: Whether to include the per-territory breakdown
+                ("territories"); the key is omitted when False
             
         Returns:
             Dictionary with economic data
         """
+        computed = self._compute_dynasty_economy(dynasty_id, include_detail)
+        return computed[0] if computed else {}
+    
+    def _compute_dynasty_economy(self, dynasty_id: int,
+                                 include_detail: bool) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Calculate a dynasty's economy, keeping the rows and arrays behind it.
+        
+        Returns:
+            Tuple of (calculate_dynasty_economy's result, figures), where
+            figures holds the loaded rows ("bundle"), the per-territory food
+            production and consumption columns, and the net production over
+            _consumption_keys with NaN where absent; None if the dynasty
+            does not exist
+        """
         dynasty = self.session.get(DynastyDB, dynasty_id)
         if not dynasty:
-            return {}
+            return None
         
-        # Get all territories controlled by the dynasty
-        territories = self.session.query(Territory).filter_by(controller_dynasty_id=dynasty_id).all()
+        # Get all territories controlled by the dynasty, with their related rows
+        bundle = self._load_dynasty_bundle(dynasty_id)
+        territories = bundle["territories"]
         
-        total_production = {}
-        total_consumption = {}
-        total_tax_income = 0.0
-        territory_data = []
+        # One row per territory: production over resource types,
+        # consumption over _consumption_keys
+        production, production_present = self._production_matrix(
+            territories, bundle["resources"], bundle["buildings"], bundle["governors"]
+        )
+        consumption, consumption_present = self._consumption_matrix(
+            territories, bundle["buildings"], bundle["units"]
+        )
         
-        for territory in territories:
-            # Calculate production
-            production = self.calculate_territory_production(territory.id)
-            
-            # Calculate consumption
-            consumption = self.calculate_territory_consumption(territory.id)
-            
-            # Calculate tax income
-            tax_income = self.calculate_territory_tax_income(territory.id)
-            total_tax_income += tax_income
-            
-            # Add to totals
-            for resource_type, amount in production.items():
-                if resource_type in total_production:
-                    total_production[resource_type] = total_production.get(resource_type, 0) + amount
-                else:
-                    total_production[resource_type] = amount
-            
-            for resource_type, amount in consumption.items():
-                if resource_type in total_consumption:
-                    total_consumption[resource_type] = total_consumption.get(resource_type, 0) + amount
-                else:
-                    total_consumption[resource_type] = amount
-            
-            # Store territory data
-            territory_data.append({
-                "id": territory.id,
-                "name": territory.name,
-                "production": production,
-                "consumption": consumption,
-                "tax_income": tax_income,
-                "population": territory.population,
-                "development_level": territory.development_level
-            })
-        
-        # Calculate net production (production - consumption)
-        net_production = {}
-        for resource_type in set(list(total_production.keys()) + list(total_consumption.keys())):
-            production_amount = total_production.get(resource_type, 0)
-            consumption_amount = total_consumption.get(resource_type, 0)
-            net_production[resource_type] = production_amount - consumption_amount
+        tax_income = self._tax_vector(
+            territories, bundle["governors"], bundle["settlement_multipliers"], bundle["monarch_traits"]
+        )
         
+        # Add to totals, and calculate net production (production -
+        # consumption) over the consumption columns
+        (total_production_arr, total_production_present, total_consumption_arr, total_consumption_present,
+         net_arr, net_present) = _aggregate_kernel(production, production_present, consumption, consumption_present)
+        total_tax_income = float(tax_income.sum())
+        
+        total_production = _vector_to_dict(total_production_arr, total_production_present, self._resource_types)
+        total_consumption = _vector_to_dict(total_consumption_arr, total_consumption_present, self._consumption_keys)
+        net_production = _vector_to_dict(net_arr, net_present, self._consumption_keys)
+        
+        # Store territory data
+        territory_data = []
+        if include_detail:
+            for i, territory in enumerate(territories):
+                territory_data.append({
+                    "id": territory.id,
+                    "name": territory.name,
+                    "production": _vector_to_dict(production[i], production_present[i], self._resource_types),
+                    "consumption": _vector_to_dict(consumption[i], consumption_present[i], self._consumption_keys),
+                    "tax_income": float(tax_income[i]),
+                    "population": territory.population,
+                    "development_level": territory.development_level
+                })
         # Calculate trade income
         trade_routes = self.session.query(TradeRoute).filter(
             (TradeRoute.source_dynasty_id == dynasty_id) | 
             (TradeRoute.target_dynasty_id == dynasty_id)
         ).all()
         
+        # Partner names in one query rather than one get() per route
+        partner_ids = {
+            route.target_dynasty_id if route.source_dynasty_id == dynasty_id else route.source_dynasty_id
+            for route in trade_routes
+        }
+        partner_names = dict(
+            self.session.query(DynastyDB.id, DynastyDB.name).filter(DynastyDB.id.in_(partner_ids)).all()
+        ) if partner_ids else {}
+        
         trade_income = 0.0
         trade_data = []
         
@@ -575,7 +1104,7 @@ class EconomySystem:
                 trade_data.append({
                     "id": route.id,
                     "type": "export",
-                    "partner": self.session.get(DynastyDB, route.target_dynasty_id).name,
+                    "partner": partner_names[route.target_dynasty_id],
                     "resource": route.resource_type.value,
                     "amount": route.resource_amount,
                     "profit": route.profit_source
@@ -586,7 +1115,7 @@ class EconomySystem:
                 trade_data.append({
                     "id": route.id,
                     "type": "import",
-                    "partner": self.session.get(DynastyDB, route.source_dynasty_id).name,
+                    "partner": partner_names[route.source_dynasty_id],
                     "resource": route.resource_type.value,
                     "amount": route.resource_amount,
                     "profit": route.profit_target
@@ -600,10 +1129,9 @@ class EconomySystem:
         # Calculate treasury change
         treasury_change = total_income - total_consumption.get(ResourceType.GOLD, 0)
         
-        return {
+        economy_data = {
             "dynasty_id": dynasty_id,
             "dynasty_name": dynasty.name,
-            "territories": territory_data,
             "total_production": total_production,
             "total_consumption": total_consumption,
             "net_production": net_production,
@@ -614,6 +1142,72 @@ class EconomySystem:
             "current_treasury": dynasty.current_wealth,
             "trade_routes": trade_data
         }
+        if include_detail:
+            economy_data["territories"] = territory_data
+        
+        figures = {
+            "bundle": bundle,
+            "food_production": production[:, _FOOD_I],
+            "food_consumption": consumption[:, _FOOD_I],
+            "net_production": np.where(net_present, net_arr, np.nan)
+        }
+        return economy_data, figures
+    
+    def _economy_summary(self, dynasty_id: int) -> Dict[str, Any]:
+        """
+        Get calculate_dynasty_economy's totals (no per-territory breakdown),
+        memoized per dynasty.
+        
+        An entry is reused while the simulation year, the treasury and the
+        _economy_fingerprint of the dynasty are unchanged, which catches
+        writes made by other systems (recruitment, conquest, completed
+        buildings). The economy mutations below also drop the entries they
+        affect (see _invalidate_economy). Callers must treat the result as
+        read-only.
+        """
+        dynasty = self.session.get(DynastyDB, dynasty_id)
+        if not dynasty:
+            return {}
+        
+        key = (dynasty.current_simulation_year, dynasty.current_wealth, self._economy_fingerprint(dynasty_id))
+        cached = self._econ_cache.get(dynasty_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        economy_data, figures = self._compute_dynasty_economy(dynasty_id, include_detail=False)
+        self._econ_cache[dynasty_id] = (key, economy_data, figures["net_production"])
+        return economy_data
+    
+    def _economy_fingerprint(self, dynasty_id: int) -> Tuple:
+        """
+        Summarise, in one query, the inputs of a dynasty's totals that other
+        systems write: the territories it controls, and the buildings and
+        military units in them (counts, plus the units' upkeep).
+        """
+        controlled = select(Territory.id).where(Territory.controller_dynasty_id == dynasty_id)
+        units = MilitaryUnit.territory_id.in_(controlled)
+        return tuple(self.session.query(
+            select(func.count(Territory.id)).where(Territory.controller_dynasty_id == dynasty_id).scalar_subquery(),
+            select(func.count(Building.id)).where(Building.territory_id.in_(controlled)).scalar_subquery(),
+            select(func.count(MilitaryUnit.id)).where(units).scalar_subquery(),
+            select(func.sum(MilitaryUnit.maintenance_cost)).where(units).scalar_subquery(),
+            select(func.sum(MilitaryUnit.food_consumption)).where(units).scalar_subquery()
+        ).one())
+    
+    def _net_production_vector(self, dynasty_id: int) -> Optional[np.ndarray]:
+        """
+        Get the memoized net production of a dynasty as an array indexed
+        like _consumption_keys (resource types first, see _RESOURCE_INDEX),
+        with NaN for resources it neither produces nor consumes.
+        """
+        if not self._economy_summary(dynasty_id):
+            return None
+        return self._econ_cache[dynasty_id][2]
+    
+    def _invalidate_economy(self, *dynasty_ids: int):
+        """Drop memoized economy totals for dynasties whose inputs changed."""
+        for dynasty_id in dynasty_ids:
+            self._econ_cache.pop(dynasty_id, None)
     
     def update_dynasty_economy(self, dynasty_id: int) -> Dict[str, Any]:
         """
@@ -629,67 +1223,99 @@ class EconomySystem:
         if not dynasty:
             return {"success": False, "message": "Dynasty not found"}
         
-        # Calculate economy
-        economy_data = self.calculate_dynasty_economy(dynasty_id)
+        # This turn changes the dynasty's figures
+        self._invalidate_economy(dynasty_id)
         
+        # Calculate economy, keeping the rows and food figures it loaded;
+        # the per-territory breakdown is not needed here
+        economy_data, figures = self._compute_dynasty_economy(dynasty_id, include_detail=False)
+        bundle = figures["bundle"]
+
+        # Dormant dynasty (no holdings, no trade): nothing to grow, deplete
+        # or fluctuate, so only the market moves this turn
+        if not bundle["territories"] and not economy_data["trade_routes"]:
+            self._update_global_market()
+            self._commit()
+            return {
+                "success": True,
+                "message": "Economy updated successfully",
+                "economy_data": economy_data
+            }
+
         # Update treasury
         dynasty.current_wealth += economy_data["treasury_change"]
         
-        # Update resources in territories
-        territories = self.session.query(Territory).filter_by(controller_dynasty_id=dynasty_id).all()
+        # Update population; growth is adjusted by food availability
+        populations = _growth_kernel(
+            np.array([territory.population for territory in bundle["territories"]], dtype=np.float64),
+            np.array([territory.development_level for territory in bundle["territories"]], dtype=np.int64),
+            figures["food_production"],
+            figures["food_consumption"],
+            self._growth_by_level
+        )
         
-        for territory in territories:
-            # Update population
-            growth_rate = self.population_growth_rates.get(territory.development_level, 0.01)
-            
-            # Adjust growth rate based on food availability
-            production = self.calculate_territory_production(territory.id)
-            consumption = self.calculate_territory_consumption(territory.id)
-            
-            food_production = production.get(ResourceType.FOOD, 0)
-            food_consumption = consumption.get(ResourceType.FOOD, 0)
-            
-            if food_production < food_consumption:
-                # Food shortage reduces growth or causes decline
-                food_ratio = food_production / food_consumption if food_consumption > 0 else 0
-                growth_rate = growth_rate * (food_ratio - 0.5)  # Can go negative
-            
-            # Apply growth
-            territory.population = max(100, int(territory.population * (1 + growth_rate)))
-            
-            # Update territory resources
-            territory_resources = self.session.query(TerritoryResource).filter_by(territory_id=territory.id).all()
-            for tr in territory_resources:
-                # Apply depletion
-                tr.current_depletion = min(1.0, tr.current_depletion + tr.depletion_rate)
+        for territory, population in zip(bundle["territories"], populations.tolist()):
+            territory.population = population
+        
+        territory_ids = [territory.id for territory in bundle["territories"]]
+        if territory_ids:
+            # Apply resource depletion in one statement
+            depletion = TerritoryResource.current_depletion + TerritoryResource.depletion_rate
+            self.session.execute(
+                update(TerritoryResource)
+                .where(TerritoryResource.territory_id.in_(territory_ids))
+                .values(current_depletion=case((depletion > 1.0, 1.0), else_=depletion)),
+                execution_options={"synchronize_session": "fetch"}
+            )
             
-            # Update buildings
-            buildings = self.session.query(Building).filter_by(territory_id=territory.id).all()
-            for building in buildings:
-                # Deteriorate condition slightly
-                building.condition = max(0, building.condition - 0.05)
-                
-                # Building completion is now handled by ProjectSystem._effect_build_building.
-                pass
+            # Deteriorate building condition slightly, in one statement.
+            # Building completion is now handled by ProjectSystem._effect_build_building.
+            condition = Building.condition - 0.05
+            self.session.execute(
+                update(Building)
+                .where(Building.territory_id.in_(territory_ids))
+                .values(condition=case((condition < 0, 0.0), else_=condition)),
+                execution_options={"synchronize_session": "fetch"}
+            )
         
         # Update trade routes
-        trade_routes = self.session.query(TradeRoute).filter(
+        trade_routes = self.session.query(TradeRoute.id, TradeRoute.source_dynasty_id).filter(
             (TradeRoute.source_dynasty_id == dynasty_id) | 
             (TradeRoute.target_dynasty_id == dynasty_id)
         ).all()
         
-        for route in trade_routes:
-            # Fluctuate profits slightly
-            if route.source_dynasty_id == dynasty_id:
-                route.profit_source *= random.uniform(0.9, 1.1)
-            else:
-                route.profit_target *= random.uniform(0.9, 1.1)
+        # Fluctuate profits slightly, this dynasty's side of each route, with
+        # one executemany UPDATE per side
+        jitter = self._get_rng().uniform(0.9, 1.1, len(trade_routes))
+        source_params = []
+        target_params = []
+        for (route_id, source_dynasty_id), factor in zip(trade_routes, jitter.tolist()):
+            params = source_params if source_dynasty_id == dynasty_id else target_params
+            params.append({"route_id": route_id, "factor": factor})
+        routes = TradeRoute.__table__
+        for column, params in ((routes.c.profit_source, source_params),
+                               (routes.c.profit_target, target_params)):
+            if params:
+                self.session.execute(
+                    routes.update()
+                    .where(routes.c.id == bindparam("route_id"))
+                    .values({column: column * bindparam("factor")}),
+                    params
+                )
+        
+        # The UPDATEs above bypass the identity map, so expire any routes
+        # already loaded to have them pick up the new profits
+        loaded = self.session.identity_map
+        for route_id, _ in trade_routes:
+            route = loaded.get(self.session.identity_key(TradeRoute, route_id))
+            if route is not None:
+                self.session.expire(route, ["profit_source", "profit_target"])
         
         # Update global market
         self._update_global_market()
         
         # Commit changes
-        self.session.commit()
+        self._commit()
         
         return {
             "success": True,
@@ -697,25 +1323,79 @@ class EconomySystem:
             "economy_data": economy_data
         }
     
+    def _get_rng(self) -> np.random.Generator:
+        """
+        Get the NumPy generator used for bulk random draws.
+        
+        Seeded from the random module on first use, so seeding random still
+        makes a game reproducible.
+        """
+        if self._rng is None:
+            self._rng = np.random.default_rng(random.getrandbits(64))
+        return self._rng
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group economy mutations into a single transaction.
+        
+        Mutation methods called inside the block flush instead of committing;
+        the block commits once on exit, or rolls back if it raises. Blocks
+        may be nested, in which case only the outermost one commits.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self.session.rollback()
+            raise
+        else:
+            if self._batch_depth == 1:
+                self.session.commit()
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._war_pairs = None
+    
+    def _active_war_pairs(self) -> Set[Tuple[int, int]]:
+        """
+        Get the (attacker, defender) dynasty pairs of all ongoing wars.
+        
+        Loaded with one query; inside batch() the set is reused until the
+        block ends.
+        """
+        if self._war_pairs is not None:
+            return self._war_pairs
+        war_pairs = set(self.session.query(War.attacker_dynasty_id, War.defender_dynasty_id).filter(
+            War.end_year.is_(None)
+        ).all())
+        if self._batch_depth:
+            self._war_pairs = war_pairs
+        return war_pairs
+    
+    def _commit(self):
+        """Commit the session, or only flush it inside batch()."""
+        if self._batch_depth:
+            self.session.flush()
+        else:
+            self.session.commit()
+    
     def _update_global_market(self):
         """Update the global market prices based on supply and demand."""
-        for resource_type, data in self.global_market_prices.items():
-            # Calculate price change based on supply and demand
-            supply = data["supply"]
-            demand = data["demand"]
-            
-            if supply > 0 and demand > 0:
-                ratio = demand / supply
-                price_change = (ratio - 1.0) * 0.2  # 20% of the ratio difference
-            else:
-                # Random fluctuation if no supply or demand data
-                price_change = random.uniform(-0.1, 0.1)
-            
-            # Apply volatility
-            price_change *= data["volatility"]
-            
-            # Update price
-            data["current_price"] = max(0.1, data["base_price"] * (1 + price_change))
+        supply = self._market_supply
+        demand = self._market_demand
+        has_data = (supply > 0) & (demand > 0)
+        
+        # 20% of the ratio difference, or a random fluctuation if no supply
+        # or demand data
+        ratio = np.divide(demand, supply, out=np.ones_like(supply), where=has_data)
+        fluctuation = self._get_rng().uniform(-0.1, 0.1, len(supply))
+        price_change = np.where(has_data, (ratio - 1.0) * 0.2, fluctuation)
+        
+        # Apply volatility and update prices
+        price_change *= self._market_volatility
+        np.maximum(self._market_base * (1 + price_change), 0.1, out=self._market_current)
             
     def construct_building(self, territory_id: int, building_type: BuildingType) -> Tuple[bool, str]:
         """
@@ -807,7 +1487,10 @@ class EconomySystem:
         Returns:
             Tuple of (success, message)
         """
-        building = self.session.get(Building, building_id)
+        # The building, its territory and the controlling dynasty in one query
+        building = self.session.get(Building, building_id, options=[
+            joinedload(Building.territory).joinedload(Territory.controller_dynasty)
+        ])
         if not building:
             return False, "Building not found"
         
@@ -815,11 +1498,11 @@ class EconomySystem:
         if building.level >= 5:
             return False, "Building is already at maximum level"
         
-        territory = self.session.get(Territory, building.territory_id)
+        territory = building.territory
         if not territory:
             return False, "Territory not found"
         
-        dynasty = self.session.get(DynastyDB, territory.controller_dynasty_id)
+        dynasty = territory.controller_dynasty
         if not dynasty:
             return False, "Controlling dynasty not found"
         
@@ -841,8 +1524,10 @@ class EconomySystem:
         # Apply upgrade immediately (single-year upgrades are instant in this model).
         building.level += 1
 
+        self._invalidate_economy(dynasty.id)
+        
         # Commit changes
-        self.session.commit()
+        self._commit()
 
         return True, f"Upgraded {building.name} to level {building.level}"
     
@@ -856,7 +1541,10 @@ class EconomySystem:
         Returns:
             Tuple of (success, message)
         """
-        building = self.session.get(Building, building_id)
+        # The building, its territory and the controlling dynasty in one query
+        building = self.session.get(Building, building_id, options=[
+            joinedload(Building.territory).joinedload(Territory.controller_dynasty)
+        ])
         if not building:
             return False, "Building not found"
         
@@ -864,37 +1552,112 @@ class EconomySystem:
         if building.condition >= 0.9:
             return False, "Building doesn't need repair"
         
-        territory = self.session.get(Territory, building.territory_id)
+        territory = building.territory
         if not territory:
             return False, "Territory not found"
         
-        dynasty = self.session.get(DynastyDB, territory.controller_dynasty_id)
+        dynasty = territory.controller_dynasty
         if not dynasty:
             return False, "Controlling dynasty not found"
         
         # Calculate repair cost based on damage
-        damage = 1.0 - building.condition
-        base_costs = self.building_construction_costs.get(building.building_type, {"gold": 100})
-        
-        repair_costs = {}
-        for resource, amount in base_costs.items():
-            repair_costs[resource] = amount * damage * 0.5  # 50% of original cost * damage percentage
+        repair_cost = self._repair_cost(building.building_type, building.condition)
         
         # Check if we can afford it
-        if dynasty.current_wealth < repair_costs.get("gold", 0):
+        if dynasty.current_wealth < repair_cost:
             return False, "Not enough gold"
         
         # Deduct costs
-        dynasty.current_wealth -= repair_costs.get("gold", 0)
+        dynasty.current_wealth -= repair_cost
         
         # Repair building
         building.condition = 1.0
         
+        self._invalidate_economy(dynasty.id)
+        
         # Commit changes
-        self.session.commit()
+        self._commit()
         
         return True, f"Repaired {building.name}"
     
+    def bulk_repair(self, building_ids: List[int]) -> List[Tuple[bool, str]]:
+        """
+        Repair several damaged buildings at once, e.g. in a maintenance tick.
+        
+        Each building is checked as in repair_building, in the given order
+        (so earlier repairs use up the dynasty's gold first); the repaired
+        buildings are then restored with a single UPDATE and one commit.
+        
+        Args:
+            building_ids: IDs of the buildings to repair
+            
+        Returns:
+            List of (success, message) tuples, one per building
+        """
+        if not building_ids:
+            return []
+        
+        # The buildings with their territory's controller in one query
+        rows = {row.id: row for row in self.session.query(
+            Building.id, Building.name, Building.building_type, Building.condition,
+            Territory.id.label("territory_id"), Territory.controller_dynasty_id
+        ).outerjoin(Territory, Building.territory_id == Territory.id).filter(
+            Building.id.in_(building_ids)
+        )}
+        
+        dynasty_ids = {row.controller_dynasty_id for row in rows.values() if row.controller_dynasty_id}
+        dynasties = {
+            dynasty.id: dynasty
+            for dynasty in self.session.query(DynastyDB).filter(DynastyDB.id.in_(dynasty_ids))
+        } if dynasty_ids else {}
+        
+        # Work on each dynasty's gold as a local and write it back once
+        wealth = {dynasty_id: dynasty.current_wealth for dynasty_id, dynasty in dynasties.items()}
+        
+        results = []
+        repaired = set()
+        for building_id in building_ids:
+            row = rows.get(building_id)
+            if not row:
+                results.append((False, "Building not found"))
+                continue
+            if building_id in repaired or row.condition >= 0.9:
+                results.append((False, "Building doesn't need repair"))
+                continue
+            if row.territory_id is None:
+                results.append((False, "Territory not found"))
+                continue
+            dynasty_id = row.controller_dynasty_id
+            if dynasty_id not in wealth:
+                results.append((False, "Controlling dynasty not found"))
+                continue
+            
+            repair_cost = self._repair_cost(row.building_type, row.condition)
+            if wealth[dynasty_id] < repair_cost:
+                results.append((False, "Not enough gold"))
+                continue
+            
+            wealth[dynasty_id] -= repair_cost
+            repaired.add(building_id)
+            results.append((True, f"Repaired {row.name}"))
+        
+        if repaired:
+            for dynasty_id, dynasty in dynasties.items():
+                dynasty.current_wealth = wealth[dynasty_id]
+            self.session.execute(
+                update(Building).where(Building.id.in_(repaired)).values(condition=1.0)
+            )
+            self._invalidate_economy(*dynasty_ids)
+            self._commit()
+        
+        return results
+    
+    def _repair_cost(self, building_type: BuildingType, condition: float) -> float:
+        """Gold cost of repairing a building: 50% of its gold construction cost times the damage."""
+        damage = 1.0 - condition
+        base_costs = self.building_construction_costs.get(building_type, {"gold": 100})
+        return base_costs.get("gold", 0) * damage * 0.5
+    
     def establish_trade_route(self, source_dynasty_id: int, target_dynasty_id: int,
                              resource_type: ResourceType, amount: float) -> Tuple[bool, str, Optional[TradeRoute]]:
         """
@@ -906,6 +1669,57 @@ class EconomySystem:
             resource_type: Type of resource to trade
             amount: Amount of resource to trade per year
             
+        Returns:
+            Tuple of (success, message, trade_route)
+        """
+        success, message, trade_route = self._build_trade_route(
+            source_dynasty_id, target_dynasty_id, resource_type, amount
+        )
+        if not success:
+            return success, message, None
+        
+        # Add to database
+        self.session.add(trade_route)
+        self._commit()
+        self._invalidate_economy(source_dynasty_id, target_dynasty_id)
+        
+        return success, message, trade_route
+    
+    def bulk_establish_trade_routes(self, routes: List[Tuple[int, int, ResourceType, float]]
+                                    ) -> List[Tuple[bool, str, Optional[TradeRoute]]]:
+        """
+        Establish several trade routes at once, e.g. while setting up a game.
+        
+        Each route is validated as in establish_trade_route; the dynasties
+        and ongoing wars are loaded once and the valid routes are inserted
+        with a single commit.
+        
+        Args:
+            routes: (source_dynasty_id, target_dynasty_id, resource_type, amount)
+                tuples
+            
+        Returns:
+            List of (success, message, trade_route) tuples, one per route
+        """
+        # Load every dynasty involved in one query; the per-route lookups
+        # then hit the identity map (the list keeps the rows referenced)
+        dynasty_ids = {dynasty_id for route in routes for dynasty_id in route[:2]}
+        dynasties = self.session.query(DynastyDB).filter(
+            DynastyDB.id.in_(dynasty_ids)
+        ).all() if dynasty_ids else []
+        
+        with self.batch():
+            results = [self._build_trade_route(*route) for route in routes]
+            self.session.add_all([trade_route for success, _, trade_route in results if success])
+            self._invalidate_economy(*dynasty_ids)
+        
+        return results
+    
+    def _build_trade_route(self, source_dynasty_id: int, target_dynasty_id: int,
+                           resource_type: ResourceType, amount: float) -> Tuple[bool, str, Optional[TradeRoute]]:
+        """
+        Validate a trade route and build it, without adding it to the session.
+        
         Returns:
             Tuple of (success, message, trade_route)
         """
@@ -917,27 +1731,22 @@ class EconomySystem:
             return False, "One or both dynasties not found", None
         
         # Check if dynasties are at war
-        wars = self.session.query(War).filter(
-            ((War.attacker_dynasty_id == source_dynasty_id) & (War.defender_dynasty_id == target_dynasty_id)) |
-            ((War.attacker_dynasty_id == target_dynasty_id) & (War.defender_dynasty_id == source_dynasty_id))
-        ).filter_by(end_year=None).first()
-        
-        if wars:
+        if {(source_dynasty_id, target_dynasty_id), (target_dynasty_id, source_dynasty_id)} & self._active_war_pairs():
             return False, "Cannot establish trade routes with enemies during war", None
         
         # Check if source dynasty produces enough of the resource
-        source_economy = self.calculate_dynasty_economy(source_dynasty_id)
-        net_production = source_economy.get("net_production", {})
+        # (NaN, i.e. not produced, fails the comparison too)
+        net_production = self._net_production_vector(source_dynasty_id)
         
-        if resource_type not in net_production or net_production[resource_type] < amount:
+        if not net_production[_RESOURCE_INDEX[resource_type]] >= amount:
             return False, f"Source dynasty doesn't produce enough {resource_type.value}", None
         
-        # Calculate base price for the resource
-        resource = self.session.query(Resource).filter_by(resource_type=resource_type).first()
-        if not resource:
+        # Base price of the resource, as loaded into the market
+        i = self._market_index.get(resource_type)
+        if i is None:
             return False, f"Resource {resource_type.value} not found in database", None
         
-        base_price = resource.base_value
+        base_price = float(self._market_base[i])
         
         # Calculate profits for both sides
         # Source gets profit from selling
@@ -959,10 +1768,6 @@ class EconomySystem:
             is_active=True
         )
         
-        # Add to database
-        self.session.add(trade_route)
-        self.session.commit()
-        
         return True, f"Established trade route for {amount} {resource_type.value} per year", trade_route
     
     def cancel_trade_route(self, trade_route_id: int, dynasty_id: int) -> Tuple[bool, str]:
@@ -987,8 +1792,10 @@ class EconomySystem:
         # Deactivate the trade route
         trade_route.is_active = False
         
+        self._invalidate_economy(trade_route.source_dynasty_id, trade_route.target_dynasty_id)
+        
         # Commit changes
-        self.session.commit()
+        self._commit()
         
         return True, "Trade route canceled"
     
@@ -1002,7 +1809,9 @@ class EconomySystem:
         Returns:
             Tuple of (success, message)
         """
-        territory = self.session.get(Territory, territory_id)
+        territory = self.session.get(Territory, territory_id, options=[
+            joinedload(Territory.controller_dynasty)
+        ])
         if not territory:
             return False, "Territory not found"
         
@@ -1010,7 +1819,7 @@ class EconomySystem:
         if not territory.controller_dynasty_id:
             return False, "Territory has no controller"
         
-        dynasty = self.session.get(DynastyDB, territory.controller_dynasty_id)
+        dynasty = territory.controller_dynasty
         if not dynasty:
             return False, "Controlling dynasty not found"
         
@@ -1018,11 +1827,8 @@ class EconomySystem:
         if territory.development_level >= 10:
             return False, "Territory is already at maximum development level"
         
-        # Calculate development cost (increases with level)
-        base_cost = 100  # Base cost in gold
-        level_multiplier = 1.0 + (territory.development_level * 0.5)  # 50% more expensive per level
-        
-        development_cost = base_cost * level_multiplier
+        # Development cost (increases with level)
+        development_cost = _DEVELOPMENT_COSTS[territory.development_level]
         
         # Check if we can afford it
         if dynasty.current_wealth < development_cost:
@@ -1034,8 +1840,10 @@ class EconomySystem:
         # Increase development level
         territory.development_level += 1
         
+        self._invalidate_economy(dynasty.id)
+        
         # Commit changes
-        self.session.commit()
+        self._commit()
         
         return True, f"Increased development level of {territory.name} to {territory.development_level}"
     
@@ -1061,7 +1869,8 @@ class EconomySystem:
         # Store tax policy in dynasty
         # This would require adding a tax_modifier field to the DynastyDB model
         # For now, we'll just return success
-        
+        return True, f"Set tax policy to {tax_modifier * 100:.0f}% of normal"
+    
     def integrate_with_map_system(self, territory_id: int) -> Dict[str, Any]:
         """
         Integrate the economy system with the map system for a territory.
@@ -1076,29 +1885,30 @@ class EconomySystem:
         if not territory:
             return {"success": False, "message": "Territory not found"}
         
-        # Get territory production and consumption
-        production = self.calculate_territory_production(territory_id)
-        consumption = self.calculate_territory_consumption(territory_id)
-        
-        # Get territory resources
-        territory_resources = self.session.query(TerritoryResource).filter_by(territory_id=territory_id).all()
+        # Load the territory's rows once and share them between production,
+        # consumption and the lists returned below
+        resources = self._resources_by_territory([territory_id])
+        buildings = self._buildings_by_territory([territory_id])
         
-        # Get buildings
-        buildings = self.session.query(Building).filter_by(territory_id=territory_id).all()
+        # Get territory production and consumption
+        production, production_present = self._production_matrix(
+            [territory], resources, buildings, self._governors_by_id([territory])
+        )
+        consumption, consumption_present = self._consumption_matrix(
+            [territory], buildings, self._units_by_territory([territory_id])
+        )
         
-        # Calculate resource efficiency based on terrain
-        terrain_efficiency = {}
-        for resource_type, base_rate in self.terrain_production_rates.get(territory.terrain_type, {}).items():
-            terrain_efficiency[resource_type] = base_rate / 2.0  # Normalize to a 0-1 scale
+        # Resource efficiency based on terrain (shared table; read-only)
+        terrain_efficiency = self._terrain_efficiency.get(territory.terrain_type, {})
         
         return {
             "success": True,
             "territory_id": territory_id,
             "territory_name": territory.name,
-            "production": production,
-            "consumption": consumption,
-            "resources": territory_resources,
-            "buildings": buildings,
+            "production": _vector_to_dict(production[0], production_present[0], self._resource_types),
+            "consumption": _vector_to_dict(consumption[0], consumption_present[0], self._consumption_keys),
+            "resources": [tr for tr, _ in resources[territory_id]],
+            "buildings": buildings[territory_id],
             "terrain_efficiency": terrain_efficiency
         }
     
@@ -1110,21 +1920,21 @@ class EconomySystem:
             dynasty_id: ID of the dynasty
             
         Returns:
-            Dictionary with integrated data
+            Dictionary with integrated data; "military_units" lists each unit
+            as a dict of the columns the economy uses
         """
         dynasty = self.session.get(DynastyDB, dynasty_id)
         if not dynasty:
             return {"success": False, "message": "Dynasty not found"}
         
-        # Get military units
-        military_units = self.session.query(MilitaryUnit).filter_by(dynasty_id=dynasty_id).all()
-        
-        # Calculate maintenance costs
-        total_gold_maintenance = sum(unit.maintenance_cost for unit in military_units)
-        total_food_maintenance = sum(unit.food_consumption for unit in military_units)
+        # Calculate maintenance costs in the database
+        total_gold_maintenance, total_food_maintenance = self.session.query(
+            func.coalesce(func.sum(MilitaryUnit.maintenance_cost), 0),
+            func.coalesce(func.sum(MilitaryUnit.food_consumption), 0)
+        ).filter_by(dynasty_id=dynasty_id).one()
         
         # Get economy data
-        economy_data = self.calculate_dynasty_economy(dynasty_id)
+        economy_data = self._economy_summary(dynasty_id)
         
         # Check if dynasty can afford maintenance
         can_afford_maintenance = dynasty.current_wealth >= total_gold_maintenance
@@ -1134,6 +1944,12 @@ class EconomySystem:
         food_consumption = economy_data.get("total_consumption", {}).get(ResourceType.FOOD, 0)
         has_enough_food = food_production >= food_consumption
         
+        # Project only the columns the economy uses rather than full units
+        military_units = [row._asdict() for row in self.session.query(
+            MilitaryUnit.id, MilitaryUnit.unit_type, MilitaryUnit.size, MilitaryUnit.territory_id,
+            MilitaryUnit.maintenance_cost, MilitaryUnit.food_consumption
+        ).filter_by(dynasty_id=dynasty_id)]
+        
         return {
             "success": True,
             "dynasty_id": dynasty_id,
@@ -1156,53 +1972,53 @@ class EconomySystem:
             dynasty_id: ID of the dynasty
             
         Returns:
-            Dictionary with integrated data
+            Dictionary with integrated data; "trade_routes" lists each active
+            route as a dict of the columns the economy uses
         """
         dynasty = self.session.get(DynastyDB, dynasty_id)
         if not dynasty:
             return {"success": False, "message": "Dynasty not found"}
         
-        # Get trade routes
-        trade_routes = self.session.query(TradeRoute).filter(
-            (TradeRoute.source_dynasty_id == dynasty_id) | 
-            (TradeRoute.target_dynasty_id == dynasty_id)
-        ).filter_by(is_active=True).all()
-        
-        # Get treaties
-        diplomatic_relations = self.session.query(DiplomaticRelation).filter(
-            (DiplomaticRelation.dynasty1_id == dynasty_id) | 
-            (DiplomaticRelation.dynasty2_id == dynasty_id)
-        ).all()
-        
-        treaties = []
-        for relation in diplomatic_relations:
-            relation_treaties = self.session.query(Treaty).filter_by(
-                diplomatic_relation_id=relation.id,
-                active=True
-            ).all()
-            treaties.extend(relation_treaties)
+        # Active trade routes on either side of the dynasty
+        route_filter = (
+            ((TradeRoute.source_dynasty_id == dynasty_id) |
+             (TradeRoute.target_dynasty_id == dynasty_id)) &
+            (TradeRoute.is_active == True)  # noqa: E712
+        )
         
-        # Calculate trade income
-        trade_income = 0.0
-        for route in trade_routes:
-            if route.source_dynasty_id == dynasty_id:
-                trade_income += route.profit_source
-            else:
-                trade_income += route.profit_target
+        # Calculate trade income in the database, taking each route's profit
+        # for the side the dynasty is on
+        trade_income = self.session.query(func.coalesce(func.sum(case(
+            (TradeRoute.source_dynasty_id == dynasty_id, TradeRoute.profit_source),
+            else_=TradeRoute.profit_target
+        )), 0.0)).filter(route_filter).scalar()
+        
+        # Active treaties of all the dynasty's relations, joined to the
+        # relations in one query (treaties is a dynamic relationship, so it
+        # cannot be selectinload-ed)
+        treaties = self.session.query(Treaty).join(
+            DiplomaticRelation, Treaty.diplomatic_relation_id == DiplomaticRelation.id
+        ).filter(
+            (DiplomaticRelation.dynasty1_id == dynasty_id) |
+            (DiplomaticRelation.dynasty2_id == dynasty_id),
+            Treaty.active == True  # noqa: E712
+        ).order_by(Treaty.diplomatic_relation_id, Treaty.id).all()
         
         # Calculate treaty effects
         treaty_effects = {}
         for treaty in treaties:
-            if treaty.treaty_type == TreatyType.TRADE_AGREEMENT:
-                treaty_effects["trade_efficiency"] = treaty_effects.get("trade_efficiency", 1.0) + 0.1
-            elif treaty.treaty_type == TreatyType.MARKET_ACCESS:
-                treaty_effects["market_access"] = True
-            elif treaty.treaty_type == TreatyType.RESOURCE_EXCHANGE:
-                treaty_effects["resource_exchange"] = True
-            elif treaty.treaty_type == TreatyType.ECONOMIC_UNION:
-                treaty_effects["trade_efficiency"] = treaty_effects.get("trade_efficiency", 1.0) + 0.2
-                treaty_effects["market_access"] = True
-                treaty_effects["resource_exchange"] = True
+            for effect, value in _TREATY_EFFECTS.get(treaty.treaty_type, {}).items():
+                if isinstance(value, bool):
+                    treaty_effects[effect] = value
+                else:
+                    treaty_effects[effect] = treaty_effects.get(effect, 1.0) + value
+        
+        # Project only the columns the economy uses rather than full routes
+        trade_routes = [row._asdict() for row in self.session.query(
+            TradeRoute.id, TradeRoute.source_dynasty_id, TradeRoute.target_dynasty_id,
+            TradeRoute.resource_type, TradeRoute.resource_amount,
+            TradeRoute.profit_source, TradeRoute.profit_target
+        ).filter(route_filter)]
         
         return {
             "success": True,
@@ -1242,28 +2058,32 @@ class EconomySystem:
         # Calculate character bonuses
         character_bonuses = {}
         for character in characters:
-            # Stewardship skill affects economy
-            if character.stewardship_skill > 0:
+            # Stewardship skill affects economy (read once; each attribute
+            # access goes through the ORM's instrumentation)
+            skill = character.stewardship_skill
+            if skill > 0:
                 character_bonuses[character.id] = {
                     "name": f"{character.name} {character.surname}",
-                    "stewardship_skill": character.stewardship_skill,
-                    "production_bonus": character.stewardship_skill * 0.01,  # +1% per point
-                    "tax_bonus": character.stewardship_skill * 0.02,  # +2% per point
+                    "stewardship_skill": skill,
+                    "production_bonus": skill * 0.01,  # +1% per point
+                    "tax_bonus": skill * 0.02,  # +2% per point
                     "traits": character.get_traits()
                 }
         
         # Calculate governor effects
+        governors = self._governors_by_id(territories)
         governor_effects = {}
         for territory in territories:
             if territory.governor_id:
-                governor = self.session.get(PersonDB, territory.governor_id)
+                governor = governors.get(territory.governor_id)
                 if governor:
+                    skill = governor.stewardship_skill
                     governor_effects[territory.id] = {
                         "territory_name": territory.name,
                         "governor_name": f"{governor.name} {governor.surname}",
-                        "stewardship_skill": governor.stewardship_skill,
-                        "production_bonus": governor.stewardship_skill * 0.01,
-                        "tax_bonus": governor.stewardship_skill * 0.02,
+                        "stewardship_skill": skill,
+                        "production_bonus": skill * 0.01,
+                        "tax_bonus": skill * 0.02,
                         "traits": governor.get_traits()
                     }
         
@@ -1275,4 +2095,3 @@ class EconomySystem:
             "character_bonuses": character_bonuses,
             "governor_effects": governor_effects
         }
-        return True, f"Set tax policy to {tax_modifier * 100:.0f}% of normal"
\ No newline at end of file
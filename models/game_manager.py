@@ -8,12 +8,14 @@ loading, and saving.
 
 import datetime
 import random
+from collections import defaultdict
 from typing import List, Dict, Tuple, Optional, Any
 import logging
 
 # Import custom logging configuration
 from utils.logging_config import setup_logger
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from models.db_models import (
@@ -21,7 +23,7 @@ from models.db_models import (
     DiplomaticRelation, TreatyType, HistoryLogEntryDB, Province, BuildingType
 )
 from models.diplomacy_system import DiplomacySystem
-from models.economy_system import EconomySystem
+from models.economy_system import EconomySystem, no_expire_on_commit
 from models.map_system import MapGenerator, TerritoryManager, MovementSystem, BorderSystem
 from models.military_system import MilitarySystem
 from models.time_system import TimeSystem, GamePhase
@@ -109,17 +111,21 @@ class GameManager:
             }
         }
         
+        # Personality types to draw from when assigning one to a new AI dynasty
+        self._personality_types = tuple(self.ai_controllers)
+        
         # Dynasty to AI controller mapping (personality-type strings for legacy logic)
         self.dynasty_ai_mapping = {}
 
         # Personality-driven AIController instances keyed by dynasty_id
         self._ai_controller_instances: Dict[int, AIController] = {}
         
-        # Game state cache with TTL and invalidation tracking
+        # Game state cache with version-based invalidation and a TTL
         self.game_state_cache = {
             'data': {},
-            'ttl': 60,  # Cache time-to-live in seconds
-            'invalidation_keys': {}  # Track keys that should invalidate cache
+            'ttl': 60,  # Upper bound, in seconds, on how long outside writes go unseen
+            'invalidation_keys': {},  # Track keys that should invalidate cache
+            'versions': defaultdict(int)  # Bumped whenever a dynasty's state changes
         }
         
         self.logger.info("Game Manager initialized successfully")
@@ -181,9 +187,10 @@ class GameManager:
             self.session.add(player_dynasty)
             self.session.flush()  # Get ID without committing
             
-            # Create AI dynasties
-            for i in range(ai_dynasties):
-                ai_dynasty = DynastyDB(
+            # Create AI dynasties; they are inserted in the same flush and the
+            # instances are kept, so there is no need to query them back
+            ai_dynasties_list = [
+                DynastyDB(
                     user_id=user_id,  # Same user owns the AI dynasties for now
                     name=f"AI Dynasty {i+1}",
                     theme_identifier_or_json="MEDIEVAL_EUROPEAN",  # Default theme (must be a valid theme key)
@@ -195,15 +202,13 @@ class GameManager:
                     infamy=0,
                     is_ai_controlled=True
                 )
-                self.session.add(ai_dynasty)
+                for i in range(ai_dynasties)
+            ]
+            self.session.add_all(ai_dynasties_list)
             
             # Distribute territories among dynasties
             all_dynasties = [player_dynasty]
             self.session.flush()  # Get IDs for all dynasties
-            
-            ai_dynasties_list = self.session.query(DynastyDB).filter_by(
-                user_id=user_id, is_ai_controlled=True
-            ).all()
             all_dynasties.extend(ai_dynasties_list)
             
             # Get all territories
@@ -233,8 +238,8 @@ class GameManager:
                                 population=random.randint(500, 1000)
                             )
                             self.session.add(new_territory)
-                            self.session.flush()
                             territories.append(new_territory)
+                        self.session.flush()  # Get IDs for all new territories
                     else:
                         return False, "Failed to create game: Not enough territories and no provinces available", None
                 except Exception as territory_error:
@@ -278,20 +283,37 @@ class GameManager:
                             territory_assignments[dynasty.id].append((territories[territory_index], False))
                             territory_index += 1
             
-            # Now perform the actual territory assignments
+            # Now perform the actual territory assignments, one UPDATE per dynasty
             for dynasty in all_dynasties:
-                for territory, is_capital in territory_assignments[dynasty.id]:
-                    try:
-                        self.map_system['territory_manager'].assign_territory(
-                            territory.id, dynasty.id, is_capital
-                        )
-                    except Exception as assign_error:
-                        self.logger.error(f"Error assigning territory {territory.id} to dynasty {dynasty.id}: {str(assign_error)}")
-                        # Continue with other assignments even if one fails
+                assignments = territory_assignments[dynasty.id]
+                capital_ids = [territory.id for territory, is_capital in assignments if is_capital]
+                try:
+                    self.map_system['territory_manager'].assign_territories(
+                        [territory.id for territory, _ in assignments], dynasty.id,
+                        capital_ids[0] if capital_ids else None
+                    )
+                except Exception as assign_error:
+                    self.logger.error(f"Error assigning territories to dynasty {dynasty.id}: {str(assign_error)}")
+                    # Continue with other dynasties even if one fails
             
-            # Initialize founder and spouse for each dynasty
+            # Initialize founder and spouse for each dynasty. Each couple is
+            # inserted in its own savepoint, so a dynasty whose rows fail to
+            # flush is skipped; the couples are linked once all are inserted.
+            founding_couples = []
             for dynasty in all_dynasties:
-                self._initialize_dynasty_founder(dynasty.id, start_year)
+                try:
+                    with self.session.begin_nested():
+                        couple = self._initialize_dynasty_founder(dynasty.id, start_year)
+                        self.session.flush()
+                    if couple:
+                        founding_couples.append(couple)
+                except Exception as founder_error:
+                    self.logger.error(f"Error initializing founder for dynasty {dynasty.id}: {str(founder_error)}")
+                    # Continue with other dynasties even if one fails
+            for founder, spouse in founding_couples:
+                if spouse is not None:
+                    founder.spouse_sim_id = spouse.id
+                    spouse.spouse_sim_id = founder.id
             
             # Commit all changes
             self.session.commit()
@@ -309,19 +331,26 @@ class GameManager:
             self.session.rollback()
             return False, f"Error creating game: {str(e)}", None
     
-    def _initialize_dynasty_founder(self, dynasty_id: int, start_year: int) -> None:
+    def _initialize_dynasty_founder(self, dynasty_id: int, start_year: int) -> Optional[Tuple[PersonDB, Optional[PersonDB]]]:
         """
         Initialize the founder and spouse for a dynasty.
         
+        The new people are added to the session but not flushed; the caller
+        flushes each dynasty in its own savepoint and then links each founder
+        and spouse.
+        
         Args:
             dynasty_id: ID of the dynasty
             start_year: Starting year
+            
+        Returns:
+            Tuple of (founder, spouse or None), or None if the dynasty is missing
         """
         try:
             dynasty = self.session.get(DynastyDB, dynasty_id)
             if not dynasty:
                 self.logger.error(f"Dynasty with ID {dynasty_id} not found during founder initialization")
-                return
+                return None
             
             self.logger.info(f"Initializing founder for dynasty {dynasty.name} (ID: {dynasty_id})")
             
@@ -352,7 +381,6 @@ class GameManager:
                     espionage_skill=random.randint(3, 8)
                 )
                 self.session.add(founder)
-                self.session.flush()  # Get ID
                 self.logger.info(f"Created founder {founder_name} for dynasty {dynasty.name}")
             except Exception as founder_error:
                 self.logger.error(f"Error creating dynasty founder: {str(founder_error)}")
@@ -372,7 +400,6 @@ class GameManager:
                     espionage_skill=5
                 )
                 self.session.add(founder)
-                self.session.flush()  # Get ID
                 self.logger.warning(f"Created emergency founder for dynasty {dynasty.name}")
             
             # Create spouse with error handling
@@ -407,11 +434,6 @@ class GameManager:
                         espionage_skill=random.randint(2, 7)
                     )
                     self.session.add(spouse)
-                    self.session.flush()  # Get ID
-                    
-                    # Link as spouses
-                    founder.spouse_sim_id = spouse.id
-                    spouse.spouse_sim_id = founder.id
                     self.logger.info(f"Created spouse {spouse_name} for founder {founder.name}")
                 except Exception as spouse_error:
                     self.logger.error(f"Error creating spouse for dynasty founder: {str(spouse_error)}")
@@ -424,7 +446,7 @@ class GameManager:
                     year=start_year,
                     event_string=f"{founder.name} founded the dynasty and became its first ruler.",
                     event_type="dynasty_founding",
-                    person1_sim_id=founder.id
+                    person1=founder
                 )
                 self.session.add(log_entry)
                 self.logger.info(f"Created founding history entry for dynasty {dynasty.name}")
@@ -434,11 +456,14 @@ class GameManager:
                 
             # Assign an AI personality if this is an AI dynasty
             if dynasty.is_ai_controlled:
-                self._assign_ai_personality(dynasty_id)
+                self._assign_ai_personality(dynasty_id, commit=False)
+            
+            return founder, spouse
                 
         except Exception as e:
             self.logger.error(f"Unhandled error in _initialize_dynasty_founder: {str(e)}")
             # We don't re-raise the exception to allow the game creation to continue
+            return None
     
     def _generate_character_name(self, dynasty_name: str, role: str) -> str:
         """
@@ -474,16 +499,12 @@ class GameManager:
             
             # Generate a name with alternating consonants and vowels
             name_length = random.randint(3, 7)
-            name_parts = []
-            
-            for i in range(name_length):
-                if i % 2 == 0:
-                    name_parts.append(random.choice(consonants))
-                else:
-                    name_parts.append(random.choice(vowels))
+            letter_pools = (consonants, vowels)
             
             # Capitalize first letter and add first letter of dynasty
-            base_name = ''.join(name_parts).capitalize()
+            base_name = ''.join(
+                random.choice(letter_pools[i % 2]) for i in range(name_length)
+            ).capitalize()
             if random.random() < 0.3:  # 30% chance to add a suffix
                 return f"{prefix} {base_name} {random.choice(suffixes)}"
             else:
@@ -493,12 +514,14 @@ class GameManager:
             self.logger.error(f"Error in name generation: {str(e)}")
             return f"{role.capitalize()} of {dynasty_name}"  # Fallback name
     
-    def _assign_ai_personality(self, dynasty_id: int) -> None:
+    def _assign_ai_personality(self, dynasty_id: int, commit: bool = True) -> None:
         """
         Assign an AI personality to a dynasty and persist it to the database.
 
         Args:
             dynasty_id: ID of the AI dynasty
+            commit: Whether to commit the new personality; game creation
+                passes False and commits once at the end
         """
         try:
             dynasty = self.session.get(DynastyDB, dynasty_id)
@@ -510,10 +533,11 @@ class GameManager:
                 self.dynasty_ai_mapping[dynasty_id] = dynasty.ai_personality
                 return
 
-            personality = random.choice(list(self.ai_controllers.keys()))
+            personality = random.choice(self._personality_types)
             self.dynasty_ai_mapping[dynasty_id] = personality
             dynasty.ai_personality = personality
-            self.session.commit()
+            if commit:
+                self.session.commit()
             self.logger.info(f"Assigned {personality} AI personality to dynasty {dynasty_id}")
         except Exception as e:
             self.logger.error(f"Error assigning AI personality: {str(e)}")
@@ -608,18 +632,12 @@ class GameManager:
         self.logger.info(f"Loading game state for dynasty ID {dynasty_id}")
         
         # Check if we have a valid cached state
-        if dynasty_id in self.game_state_cache['data']:
-            cache_entry = self.game_state_cache['data'][dynasty_id]
-            cache_age = (datetime.datetime.now() - cache_entry['last_updated']).total_seconds()
-            
-            # If cache is still valid, return it
-            if cache_age < self.game_state_cache['ttl']:
-                self.logger.info(f"Using cached game state for dynasty {dynasty_id} (age: {cache_age:.1f}s)")
-                return cache_entry['state']
-            else:
-                self.logger.debug(f"Cache expired for dynasty {dynasty_id} (age: {cache_age:.1f}s)")
+        cache_entry = self._get_cached_state(dynasty_id)
+        if cache_entry is not None:
+            self.logger.info(f"Using cached game state for dynasty {dynasty_id}")
+            return cache_entry['state']
         
-        # Cache miss or expired, load from database
+        # Cache miss or outdated, load from database
         dynasty = self.session.get(DynastyDB, dynasty_id)
         if not dynasty:
             error_msg = f"Dynasty with ID {dynasty_id} not found"
@@ -712,41 +730,40 @@ class GameManager:
             } for a in armies]
         }
         
-        # Get diplomatic relations
+        # Get diplomatic relations, each joined to the other dynasty in one query
         relations = []
-        for relation in self.session.query(DiplomaticRelation).all():
-            other_dynasty_id = None
-            if relation.dynasty1_id == dynasty_id:
-                other_dynasty_id = relation.dynasty2_id
-            elif relation.dynasty2_id == dynasty_id:
-                other_dynasty_id = relation.dynasty1_id
-            
-            if other_dynasty_id:
-                other_dynasty = self.session.get(DynastyDB, other_dynasty_id)
-                if other_dynasty:
-                    status, score = self.diplomacy_system.get_relation_status(
-                        dynasty_id, other_dynasty_id
-                    )
-                    relations.append({
-                        'dynasty_id': other_dynasty_id,
-                        'dynasty_name': other_dynasty.name,
-                        'status': status,
-                        'score': score
-                    })
+        other_dynasty_join = or_(
+            and_(DiplomaticRelation.dynasty1_id == dynasty_id,
+                 DynastyDB.id == DiplomaticRelation.dynasty2_id),
+            and_(DiplomaticRelation.dynasty2_id == dynasty_id,
+                 DynastyDB.id == DiplomaticRelation.dynasty1_id)
+        )
+        for relation, other_dynasty in self.session.query(DiplomaticRelation, DynastyDB).join(
+            DynastyDB, other_dynasty_join
+        ).order_by(DiplomaticRelation.id).all():
+            relations.append({
+                'dynasty_id': other_dynasty.id,
+                'dynasty_name': other_dynasty.name,
+                'status': self.diplomacy_system.relation_status_for_score(relation.relation_score),
+                'score': relation.relation_score
+            })
         
         game_state['diplomacy'] = {
             'relations': relations
         }
         
-        # Get active wars
+        # Get active wars, each joined to the opposing dynasty
         wars = []
-        for war in self.session.query(War).filter(
+        opponent_join = or_(
+            and_(War.attacker_dynasty_id == dynasty_id, DynastyDB.id == War.defender_dynasty_id),
+            and_(War.defender_dynasty_id == dynasty_id, DynastyDB.id == War.attacker_dynasty_id)
+        )
+        for war, other_dynasty in self.session.query(War, DynastyDB).outerjoin(
+            DynastyDB, opponent_join
+        ).filter(
             ((War.attacker_dynasty_id == dynasty_id) | (War.defender_dynasty_id == dynasty_id)) &
             (War.end_year == None)
         ).all():
-            other_dynasty_id = war.defender_dynasty_id if war.attacker_dynasty_id == dynasty_id else war.attacker_dynasty_id
-            other_dynasty = self.session.get(DynastyDB, other_dynasty_id)
-            
             wars.append({
                 'id': war.id,
                 'against': other_dynasty.name if other_dynasty else "Unknown",
@@ -775,6 +792,7 @@ class GameManager:
         self.logger.debug(f"Caching game state for dynasty {dynasty_id}")
         self.game_state_cache['data'][dynasty_id] = {
             'last_updated': datetime.datetime.now(),
+            'version': self.game_state_cache['versions'][dynasty_id],
             'state': game_state,
             'current_year': dynasty.current_simulation_year,
             'current_phase': GamePhase.PLANNING
@@ -790,6 +808,54 @@ class GameManager:
         
         return game_state
     
+    def _get_cached_state(self, dynasty_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a dynasty's cached game state entry if it is still current.
+        
+        An entry is current while the dynasty's version matches the one it was
+        cached at and it is younger than the TTL. Versions are bumped for changes
+        made through the game manager; the TTL bounds how long writes made
+        elsewhere (routes committing through db.session) can go unseen.
+        
+        Args:
+            dynasty_id: ID of the dynasty
+            
+        Returns:
+            The cache entry, or None if there is no current one
+        """
+        cache_entry = self.game_state_cache['data'].get(dynasty_id)
+        if cache_entry is None:
+            return None
+        
+        if cache_entry.get('version') != self.game_state_cache['versions'][dynasty_id]:
+            self.logger.debug(f"Cache outdated for dynasty {dynasty_id}")
+            return None
+        
+        cache_age = (datetime.datetime.now() - cache_entry['last_updated']).total_seconds()
+        if cache_age >= self.game_state_cache['ttl']:
+            self.logger.debug(f"Cache expired for dynasty {dynasty_id} (age: {cache_age:.1f}s)")
+            return None
+        
+        return cache_entry
+    
+    def _invalidate_game_state(self, dynasty_id: int, include_related: bool = False) -> None:
+        """
+        Mark a dynasty's cached game state as outdated by bumping its version.
+        
+        Args:
+            dynasty_id: ID of the dynasty whose state changed
+            include_related: Also invalidate dynasties with relations, wars or
+                trade routes involving this one
+        """
+        self.logger.debug(f"Invalidating cache for dynasty {dynasty_id}")
+        self.game_state_cache['versions'][dynasty_id] += 1
+        
+        # Related dynasties only matter if something is cached at all
+        if include_related and self.game_state_cache['data']:
+            for related_id in self._get_related_dynasties(dynasty_id):
+                self.logger.debug(f"Invalidating cache for related dynasty {related_id}")
+                self.game_state_cache['versions'][related_id] += 1
+    
     def save_game(self, dynasty_id: int) -> Tuple[bool, str]:
         """
         Save the current game state for a dynasty.
@@ -866,18 +932,9 @@ class GameManager:
                 'type': event.event_type
             } for event in recent_events]
             
-            # Invalidate cache for this dynasty
-            if dynasty_id in self.game_state_cache['data']:
-                self.logger.debug(f"Invalidating cache for dynasty {dynasty_id}")
-                del self.game_state_cache['data'][dynasty_id]
-                
-                # Also invalidate any related dynasties (those with diplomatic relations, wars, etc.)
-                if dynasty_id in self.game_state_cache['invalidation_keys']:
-                    related_dynasties = self._get_related_dynasties(dynasty_id)
-                    for related_id in related_dynasties:
-                        if related_id in self.game_state_cache['data']:
-                            self.logger.debug(f"Invalidating cache for related dynasty {related_id}")
-                            del self.game_state_cache['data'][related_id]
+            # Invalidate cache for this dynasty and any related dynasties
+            # (those with diplomatic relations, wars, etc.)
+            self._invalidate_game_state(dynasty_id, include_related=True)
             
             self.logger.info(f"Turn processed successfully for dynasty {dynasty.name}, new year: {dynasty.current_simulation_year}")
             return True, "Turn processed successfully", turn_results
@@ -931,7 +988,10 @@ class GameManager:
                                 self.dynasty_ai_mapping[dynasty.id] = dynasty.ai_personality
                             else:
                                 self._assign_ai_personality(dynasty.id)
-                        self._generate_ai_decisions(dynasty.id)
+                        # One commit for whatever economy changes the rules make;
+                        # the rows they wrote stay loaded for the rest of the turn
+                        with no_expire_on_commit(self.session), self.economy_system.batch():
+                            self._generate_ai_decisions(dynasty.id)
 
                     # Process turn
                     turn_success, turn_message = self.time_system.process_turn(dynasty.id)
@@ -941,8 +1001,7 @@ class GameManager:
                         self.logger.info(f"Successfully processed turn for AI dynasty {dynasty.name}")
                         
                         # Invalidate cache for this dynasty
-                        if dynasty.id in self.game_state_cache['data']:
-                            del self.game_state_cache['data'][dynasty.id]
+                        self._invalidate_game_state(dynasty.id)
                     else:
                         error_count += 1
                         self.logger.error(f"Failed to process turn for AI dynasty {dynasty.name}: {turn_message}")
@@ -1233,6 +1292,9 @@ class GameManager:
                         dynasty.current_simulation_year,
                     )
                     self.session.commit()
+                    # Both belligerents, and their allies, now see the war
+                    self._invalidate_game_state(dynasty_id, include_related=True)
+                    self._invalidate_game_state(target.id, include_related=True)
                 return  # attempt at most one war declaration per turn
 
         except Exception as e:
@@ -1342,6 +1404,7 @@ class GameManager:
             )
             if success:
                 self.logger.info(f"AI {dynasty.name} performed '{action_type}' towards {target_dynasty.name}")
+                self._invalidate_game_state(target_dynasty.id, include_related=True)
             else:
                 self.logger.debug(f"AI {dynasty.name} diplomatic action '{action_type}' failed: {message}")
 
@@ -1354,6 +1417,7 @@ class GameManager:
                 )
                 if ok:
                     self.logger.info(f"AI {dynasty.name} signed non-aggression pact with {target_dynasty.name}")
+                    self._invalidate_game_state(target_dynasty.id, include_related=True)
 
         except Exception as e:
             self.logger.error(f"Error making diplomacy decision for dynasty {dynasty_id}: {str(e)}")
@@ -1539,18 +1603,12 @@ class GameManager:
             
             # Check if game state needs to be refreshed
             cache_valid = False
-            if 'data' in self.game_state_cache and dynasty_id in self.game_state_cache['data']:
-                cache_entry = self.game_state_cache['data'][dynasty_id]
-                cache_age = (datetime.datetime.now() - cache_entry['last_updated']).total_seconds()
-                
-                # Check if cache is still valid
-                if cache_age < self.game_state_cache['ttl']:
-                    self.logger.debug(f"Using cached game state for dynasty {dynasty_id} (age: {cache_age:.1f}s)")
-                    sync_data['game_state'] = cache_entry['state']
-                    sync_data['game_state_fresh'] = False
-                    cache_valid = True
-                else:
-                    self.logger.debug(f"Cache expired for dynasty {dynasty_id} (age: {cache_age:.1f}s)")
+            cache_entry = self._get_cached_state(dynasty_id)
+            if cache_entry is not None:
+                self.logger.debug(f"Using cached game state for dynasty {dynasty_id}")
+                sync_data['game_state'] = cache_entry['state']
+                sync_data['game_state_fresh'] = False
+                cache_valid = True
             
             # Load fresh game state if cache is invalid
             if not cache_valid:
@@ -10,6 +10,7 @@ import math
 import heapq
 import numpy as np
 from typing import List, Dict, Tuple, Set, Optional, Union, Any
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from models.db_models import (
     db, Region, Province, Territory, TerrainType, Settlement,
@@ -842,6 +843,42 @@ class TerritoryManager:
         self.session.commit()
         return territory
     
+    def assign_territories(self, territory_ids: List[int], dynasty_id: int,
+                           capital_territory_id: Optional[int] = None) -> int:
+        """
+        Assign several territories to a dynasty with a single UPDATE.
+        
+        Unlike assign_territory this does not commit, so callers setting up
+        many territories at once can commit when they are done.
+        
+        Args:
+            territory_ids: IDs of the territories to assign
+            dynasty_id: ID of the dynasty to assign the territories to
+            capital_territory_id: ID of the territory (among territory_ids) to
+                make the dynasty's capital, if any
+            
+        Returns:
+            Number of territories updated
+        """
+        if not territory_ids:
+            return 0
+        
+        is_capital = Territory.id == capital_territory_id if capital_territory_id is not None else False
+        result = self.session.execute(
+            update(Territory)
+            .where(Territory.id.in_(territory_ids))
+            .values(controller_dynasty_id=dynasty_id, is_capital=is_capital)
+        )
+        
+        # If a capital was given, update the dynasty's capital territory
+        if capital_territory_id is not None:
+            from models.db_models import DynastyDB
+            dynasty = self.session.get(DynastyDB, dynasty_id)
+            if dynasty:
+                dynasty.capital_territory_id = capital_territory_id
+        
+        return result.rowcount
+    
     def develop_territory(self, territory_id: int, development_type: str) -> Territory:
         """
         Develop a territory by increasing its development level or adding buildings.
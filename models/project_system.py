@@ -409,25 +409,12 @@ def _effect_build_building(session: Session, project: Project) -> None:
         )
         return
 
-    # Compute effects_json using the EconomySystem's bonus table (import inline
-    # to avoid module-level circular import between project_system ↔ economy_system).
+    # effects_json comes cached per building type from the economy system's
+    # default bonus table (import inline to avoid module-level circular import
+    # between project_system ↔ economy_system).
     try:
-        from models.economy_system import EconomySystem as _ES
-        from models.db_models import ResourceType as _RT
-        # Construct a bare EconomySystem just to read the bonus dict.
-        _es = _ES.__new__(_ES)
-        _es.session = session
-        _es.territory_manager = None
-        # Re-run __init__ via a minimal shim that only sets the bonus dict.
-        # Safer: import the module-level bonus constant directly.
-        # Since it's an instance dict built in __init__, we call __init__ properly.
-        _es.__init__(session)
-        bonuses = _es.building_production_bonuses.get(bt, {})
-        effects_dict = {
-            rt.value: bonuses.get(rt, 0)
-            for rt in _RT
-        }
-        effects_json_str = _json.dumps(effects_dict)
+        from models.economy_system import effects_json_for
+        effects_json_str = effects_json_for(bt)
     except Exception as eff_exc:
         logger.warning(
             "build_building project %s: failed to compute effects_json (%s) — using empty",
@@ -82,6 +82,9 @@ class TimeSystem:
         # Scheduled events queue
         self.scheduled_events = []
         
+        # Economy system shared by every dynasty's economic phase (created lazily)
+        self._economy_system = None
+        
         # Season effects on production and movement
         self.season_production_modifiers = {
             Season.SPRING: {
@@ -895,9 +898,7 @@ class TimeSystem:
                 event["processed"] = True
             
             # Update economy
-            from models.economy_system import EconomySystem
-            economy_system = EconomySystem(self.session)
-            economy_system.update_dynasty_economy(dynasty_id)
+            self._get_economy_system().update_dynasty_economy(dynasty_id)
             
             # Apply seasonal effects
             current_season = self.get_current_season(current_year)
@@ -1076,6 +1077,18 @@ class TimeSystem:
             logger.warning(f"Chronicle LLM call failed: {e}")
             return generate_chronicle_fallback(events, dynasty_name, year)
 
+    def _get_economy_system(self):
+        """
+        Get the economy system used for economic phases.
+        
+        Built once per TimeSystem, so processing many dynasties in a turn
+        does not rebuild its lookup tables and market for each one.
+        """
+        if self._economy_system is None:
+            from models.economy_system import EconomySystem
+            self._economy_system = EconomySystem(self.session)
+        return self._economy_system
+    
     def synchronize_turns(self, dynasty_ids: List[int]) -> Tuple[bool, str]:
         """
         Synchronize turns for multiple dynasties.
@@ -25,6 +25,9 @@ import os
 import json
 import random
 import logging
+from functools import lru_cache
+
+from sqlalchemy import func
 
 from models.db_models import (
     db, DynastyDB, PersonDB, HistoryLogEntryDB, ClaimDB
@@ -152,6 +155,11 @@ def process_dynasty_turn(dynasty_id: int, years_to_advance: int = 5):
         if (start_year - person.birth_year) >= HEIR_MAJORITY_AGE:
             person.has_seen_majority = True
 
+    # Children already born to each living woman, counted in one grouped
+    # query and kept current as births happen, instead of one COUNT per
+    # married woman per year in process_childbirth_check.
+    child_counts = _count_children([p.id for p in living_persons if p.gender == "FEMALE"])
+
     # Process each year — interrupt-driven loop (Sprint 1)
     interrupt = None
     years_advanced = 0
@@ -212,7 +220,7 @@ def process_dynasty_turn(dynasty_id: int, years_to_advance: int = 5):
 
                 # Process childbirth for married women
                 if person.gender == "FEMALE" and person.spouse_sim_id is not None:
-                    process_childbirth_check(dynasty, person, current_year, theme_config)
+                    process_childbirth_check(dynasty, person, current_year, theme_config, child_counts)
 
             # Update living persons list (remove those who died)
             living_persons = [p for p in living_persons if p.death_year is None]
@@ -523,33 +531,93 @@ def process_dynasty_turn(dynasty_id: int, years_to_advance: int = 5):
 # Lifecycle helpers
 # ===========================================================================
 
-def process_death_check(person: PersonDB, current_year: int, theme_config: dict):
-    """Check if a person dies this year."""
-    age = current_year - person.birth_year
+def _other_surname(surnames: list, dynasty_name: str, fallback: str) -> str:
+    """Draw one of the theme's dynastic surnames other than ``dynasty_name``.
+
+    Redraws on a clash with the dynasty's own name instead of filtering the
+    pool first, so a draw costs O(1) for the usual pool with a single
+    clashing entry. Only after repeated clashes is the pool filtered; with
+    no other surname at all, ``fallback`` is returned.
+    """
+    if len(surnames) > 1:
+        for _ in range(8):
+            surname = random.choice(surnames)
+            if surname != dynasty_name:
+                return surname
+        others = [s for s in surnames if s != dynasty_name]
+        if others:
+            return random.choice(others)
+    return fallback
+
+
+@lru_cache(maxsize=1024)
+def _trait_list(traits_json: str) -> tuple:
+    """Parse a PersonDB.traits_json string into a tuple, once per distinct string.
+
+    Trait lists repeat heavily across a dynasty, so yearly trait checks share
+    a parsed list instead of decoding the JSON for every person-year.
+    """
+    return tuple(json.loads(traits_json or '[]'))
 
-    # Base mortality chance increases with age
-    base_mortality = 0.01  # 1% base chance
 
-    # Age modifiers
-    if age < 5:
-        # Child mortality
-        base_mortality = 0.15 * theme_config.get("mortality_factor", 1.0)
-    elif age > 60:
-        # Elderly mortality increases
-        base_mortality = 0.05 * theme_config.get("mortality_factor", 1.0)
-        if age > 75:
-            base_mortality += 0.15 * theme_config.get("mortality_factor", 1.0)
+@lru_cache(maxsize=1024)
+def _trait_set(traits_json: str) -> frozenset:
+    """The traits of a PersonDB.traits_json string as a set, for membership checks."""
+    return frozenset(_trait_list(traits_json))
 
+
+@lru_cache(maxsize=64)
+def _mortality_by_age(mortality_factor: float, max_age_factor: float, sickly: bool) -> tuple:
+    """Yearly death chance indexed by age, for one theme and Sickly-ness.
+
+    The last entry covers every older age (past the themed max age, where
+    death is certain). Built once per combination, so the yearly death check
+    is a table lookup instead of re-deriving the curve for every person.
+    """
     # Check against themed max age
-    max_age = 85 * theme_config.get("max_age_factor", 1.0)
+    max_age = 85 * max_age_factor
 
-    # Sickly trait halves expected lifespan and doubles mortality
-    if "Sickly" in person.get_traits():
+    # Sickly trait halves expected lifespan
+    if sickly:
         max_age *= 0.5
-        base_mortality *= 2
 
-    if age > max_age:
-        base_mortality = 1.0  # Guaranteed death if past max age
+    chances = []
+    for age in range(max(int(max_age) + 1, 1)):
+        # Base mortality chance increases with age
+        base_mortality = 0.01  # 1% base chance
+
+        # Age modifiers
+        if age < 5:
+            # Child mortality
+            base_mortality = 0.15 * mortality_factor
+        elif age > 60:
+            # Elderly mortality increases
+            base_mortality = 0.05 * mortality_factor
+            if age > 75:
+                base_mortality += 0.15 * mortality_factor
+
+        # Sickly trait doubles mortality
+        if sickly:
+            base_mortality *= 2
+
+        if age > max_age:
+            base_mortality = 1.0  # Guaranteed death if past max age
+        chances.append(base_mortality)
+
+    chances.append(1.0)
+    return tuple(chances)
+
+
+def process_death_check(person: PersonDB, current_year: int, theme_config: dict):
+    """Check if a person dies this year."""
+    age = current_year - person.birth_year
+
+    chances = _mortality_by_age(
+        theme_config.get("mortality_factor", 1.0),
+        theme_config.get("max_age_factor", 1.0),
+        "Sickly" in _trait_set(person.traits_json),
+    )
+    base_mortality = chances[min(max(age, 0), len(chances) - 1)]
 
     # Roll for death
     if random.random() < base_mortality:
@@ -761,7 +829,7 @@ def process_marriage_check(dynasty: DynastyDB, person: PersonDB, current_year: i
 
         # Choose a different surname for spouse
         available_surnames = theme_config.get("surnames_dynastic", ["OtherHouse"])
-        spouse_surname = random.choice([s for s in available_surnames if s != dynasty.name]) if len(available_surnames) > 1 else "OtherHouse"
+        spouse_surname = _other_surname(available_surnames, dynasty.name, "OtherHouse")
 
         # Determine spouse age
         spouse_age = random.randint(min_marriage_age, max_marriage_age)
@@ -819,8 +887,35 @@ def process_marriage_check(dynasty: DynastyDB, person: PersonDB, current_year: i
     return False
 
 
-def process_childbirth_check(dynasty: DynastyDB, woman: PersonDB, current_year: int, theme_config: dict):
-    """Check if a married woman has a child this year."""
+def _count_children(parent_ids: list) -> dict:
+    """Return {person id: number of children} for ``parent_ids`` (every id present).
+
+    Counts children on either the mother or the father side, matching the
+    per-woman query in ``process_childbirth_check``.
+    """
+    counts = dict.fromkeys(parent_ids, 0)
+    if not parent_ids:
+        return counts
+    for parent_column in (PersonDB.mother_sim_id, PersonDB.father_sim_id):
+        rows = (
+            db.session.query(parent_column, func.count(PersonDB.id))
+            .filter(parent_column.in_(parent_ids))
+            .group_by(parent_column)
+            .all()
+        )
+        for parent_id, count in rows:
+            counts[parent_id] += count
+    return counts
+
+
+def process_childbirth_check(dynasty: DynastyDB, woman: PersonDB, current_year: int, theme_config: dict,
+                             child_counts: dict = None):
+    """Check if a married woman has a child this year.
+
+    ``child_counts`` (from ``_count_children``) replaces the per-call
+    children COUNT query for the women it covers, and is incremented when a
+    child is born.
+    """
     age = current_year - woman.birth_year
 
     # Check if woman is of childbearing age
@@ -839,10 +934,13 @@ def process_childbirth_check(dynasty: DynastyDB, woman: PersonDB, current_year:
         return False
 
     # Check max children
-    existing_children = PersonDB.query.filter(
-        (PersonDB.mother_sim_id == woman.id) |
-        (PersonDB.father_sim_id == woman.id)
-    ).count()
+    if child_counts is not None and woman.id in child_counts:
+        existing_children = child_counts[woman.id]
+    else:
+        existing_children = PersonDB.query.filter(
+            (PersonDB.mother_sim_id == woman.id) |
+            (PersonDB.father_sim_id == woman.id)
+        ).count()
 
     max_children = 8 * theme_config.get("max_children_factor", 1.0)
     if existing_children >= max_children:
@@ -915,6 +1013,8 @@ def process_childbirth_check(dynasty: DynastyDB, woman: PersonDB, current_year:
         db.session.add(child)
         db.session.flush()  # Ensure child.id is assigned before portrait generation
         child.generate_portrait()
+        if child_counts is not None:
+            child_counts[woman.id] = existing_children + 1
 
         # Log birth
         from utils.llm_narration import narrate_event
@@ -976,17 +1076,23 @@ def process_childbirth_check(dynasty: DynastyDB, woman: PersonDB, current_year:
     return False
 
 
+# Succession sort key per rule, looked up once per sort rather than
+# branching on the rule string each time.
+_SUCCESSION_SORT_KEYS = {
+    # Males first, then oldest first
+    "PRIMOGENITURE_MALE_PREFERENCE": lambda p: (p.gender != "MALE", p.birth_year),
+    # Oldest first
+    "PRIMOGENITURE_ABSOLUTE": lambda p: p.birth_year,
+    # For simplicity, most traits first, then oldest first
+    "ELECTIVE_NOBLE_COUNCIL": lambda p: (-len(_trait_list(p.traits_json)), p.birth_year),
+}
+
+
 def _sort_by_rule(people: list, succession_rule: str) -> None:
     """Sort a list of candidate PersonDB rows in place per the succession rule."""
-    if succession_rule == "PRIMOGENITURE_MALE_PREFERENCE":
-        # Sort by gender (males first) then by birth year (oldest first)
-        people.sort(key=lambda p: (p.gender != "MALE", p.birth_year))
-    elif succession_rule == "PRIMOGENITURE_ABSOLUTE":
-        # Sort by birth year only (oldest first)
-        people.sort(key=lambda p: p.birth_year)
-    elif succession_rule == "ELECTIVE_NOBLE_COUNCIL":
-        # For simplicity, just sort by traits count (desc) and age (oldest first)
-        people.sort(key=lambda p: (-len(p.get_traits()), p.birth_year))
+    key = _SUCCESSION_SORT_KEYS.get(succession_rule)
+    if key is not None:
+        people.sort(key=key)
 
 
 def get_succession_candidates(dynasty: DynastyDB, deceased_monarch: PersonDB, theme_config: dict) -> list:
@@ -1150,7 +1256,7 @@ def process_world_events(dynasty: DynastyDB, current_year: int, theme_config: di
 
             if "{rival_clan_name}" in narrative:
                 available_surnames = theme_config.get("surnames_dynastic", ["Rivals"])
-                rival_name = random.choice([s for s in available_surnames if s != dynasty.name]) if len(available_surnames) > 1 else "Rivals"
+                rival_name = _other_surname(available_surnames, dynasty.name, "Rivals")
                 narrative = narrative.replace("{rival_clan_name}", rival_name)
 
             # Apply wealth change if specified
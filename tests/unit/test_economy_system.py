@@ -0,0 +1,1132 @@
+"""Tests for EconomySystem market and per-dynasty economy calculations.
+
+Covers:
+- global market stored as parallel arrays, exposed through a dict view
+- _update_global_market keeps prices within volatility bounds
+- update_dynasty_economy fast path for dormant dynasties, and reuse of the
+  rows its economy calculation loaded; calculate_dynasty_economy keeps no
+  instance state
+- population growth computed for all of a dynasty's territories at once
+- development levels missing from the tax/growth tables get the default rate
+- resource depletion, building wear and trade profit jitter applied as
+  bulk UPDATEs; loaded trade routes see the jittered profit
+- get_market_price index lookup
+- calculate_dynasty_economy loads territory rows in bulk and agrees with the
+  per-territory calculations, naming trade partners from one query; the
+  per-territory breakdown is optional and totals are reduced by one kernel
+- array-based territory production matches the documented rules
+- tax income computed across a dynasty's territories at once; settlement
+  bonuses come from one grouped query
+- set_tax_policy returns its (success, message) tuple
+- building repair/upgrade and territory development load their territory
+  and dynasty with the row itself; no_expire_on_commit restores the setting;
+  bulk_repair restores buildings with one UPDATE
+- economy totals memoized per dynasty until the year, treasury, or the
+  territories, buildings and units behind them change (also from other
+  systems), or an economy mutation drops them;
+  trade routes check the memoized net production vector
+- trade routes refused between dynasties at war, with ongoing wars loaded
+  once per batch and resource prices taken from the market;
+  bulk_establish_trade_routes inserts with one commit
+- military integration sums unit maintenance in the database, and diplomacy
+  integration sums trade income there; both list units/routes as dicts of
+  the economy's columns
+- character and diplomacy integration load governors and treaties with a
+  fixed number of queries (treaties joined to their relations); map integration loads each territory table once
+- batch() commits grouped mutations once, or rolls them all back
+- lookup tables (including each building type's effects_json and each
+  terrain's efficiency) are built once and shared between instances;
+  effects_json_for serves the same JSON without an EconomySystem
+"""
+import json
+import random
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from models.db_models import (
+    Building, BuildingType, DiplomaticRelation, DynastyDB, MilitaryUnit, PersonDB, Province,
+    Region, Resource, ResourceType, Settlement, Territory, TerritoryResource,
+    TerrainType, TradeRoute, Treaty, TreatyType, UnitType, User, War, WarGoal,
+)
+import models.economy_system as economy_module
+from models.economy_system import EconomySystem, effects_json_for
+from models.military_system import MilitarySystem
+
+
+# ---------------------------------------------------------------------------
+# Fixtures / helpers (same pattern as test_construct_building.py)
+# ---------------------------------------------------------------------------
+
+def _make_resources(session):
+    for i, resource_type in enumerate(ResourceType):
+        session.add(Resource(
+            name=resource_type.value.title(),
+            resource_type=resource_type,
+            base_value=10 + i,
+            volatility=0.2,
+        ))
+    session.commit()
+
+
+def _make_user_and_dynasty(session, name='Test Dynasty', year=1300, wealth=500):
+    suffix = uuid.uuid4().hex[:8]
+    slug = name.lower().replace(' ', '_')
+    user = User(username=f"u_{slug}_{suffix}", email=f"{slug}+{suffix}@x.test")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+    dynasty = DynastyDB(
+        user_id=user.id,
+        name=name,
+        theme_identifier_or_json="medieval_europe",
+        start_year=year,
+        current_simulation_year=year,
+        current_wealth=wealth,
+    )
+    session.add(dynasty)
+    session.commit()
+    return user, dynasty
+
+
+def _make_territory(session, dynasty, name='Testburg', dev_level=1,
+                    terrain=TerrainType.PLAINS, population=1000):
+    suffix = uuid.uuid4().hex[:6]
+    region = Region(name=f"Region_{suffix}", description="Test region")
+    session.add(region)
+    session.commit()
+    province = Province(
+        region_id=region.id,
+        name=f"Province_{suffix}",
+        primary_terrain=terrain,
+    )
+    session.add(province)
+    session.commit()
+    territory = Territory(
+        province_id=province.id,
+        name=f"{name}_{suffix}",
+        terrain_type=terrain,
+        x_coordinate=0.0,
+        y_coordinate=0.0,
+        controller_dynasty_id=dynasty.id if dynasty else None,
+        development_level=dev_level,
+        population=population,
+    )
+    session.add(territory)
+    session.commit()
+    return territory
+
+
+def _populate_territory(session, territory, dynasty, governor=None):
+    """Give a territory one of everything the economy reads."""
+    food = session.query(Resource).filter_by(resource_type=ResourceType.FOOD).one()
+    session.add(TerritoryResource(territory_id=territory.id, resource_id=food.id,
+                                  base_production=4.0, quality=1.2,
+                                  depletion_rate=0.05, current_depletion=0.1))
+    session.add(Building(territory_id=territory.id, building_type=BuildingType.FARM,
+                         name="Farm", construction_year=1290, condition=0.9))
+    session.add(Building(territory_id=territory.id, building_type=BuildingType.MARKET,
+                         name="Market", construction_year=1290, condition=0.3))
+    session.add(Settlement(territory_id=territory.id, name="Town", settlement_type="town"))
+    session.add(MilitaryUnit(dynasty_id=dynasty.id, unit_type=UnitType.ARCHERS, size=50,
+                             territory_id=territory.id, maintenance_cost=4,
+                             food_consumption=1.5, created_year=1300))
+    if governor:
+        territory.governor_id = governor.id
+    session.commit()
+
+
+def _make_dynasty_with_territories(session, n_territories, name='Test Dynasty'):
+    if not session.query(Resource).count():
+        _make_resources(session)
+    _, dynasty = _make_user_and_dynasty(session, name=name)
+    governor = PersonDB(dynasty_id=dynasty.id, name="Gov", surname=dynasty.name,
+                        gender="MALE", birth_year=1270, stewardship_skill=10)
+    session.add(governor)
+    session.commit()
+    terrains = [TerrainType.PLAINS, TerrainType.HILLS, TerrainType.FOREST]
+    for i in range(n_territories):
+        territory = _make_territory(session, dynasty, dev_level=1 + i % 3,
+                                    terrain=terrains[i % 3], population=600 + 300 * i)
+        _populate_territory(session, territory, dynasty,
+                            governor=governor if i % 2 == 0 else None)
+    return dynasty
+
+
+@contextmanager
+def _count_queries(session):
+    """Count SELECT statements issued on the session's engine."""
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestGlobalMarket:
+    """Verify the array-backed global market."""
+
+    def test_market_arrays_parallel_to_types(self, session):
+        _make_resources(session)
+        es = EconomySystem(session)
+        n = len(ResourceType)
+        assert len(es._market_types) == n
+        for arr in (es._market_base, es._market_current, es._market_volatility,
+                    es._market_supply, es._market_demand):
+            assert isinstance(arr, np.ndarray)
+            assert arr.shape == (n,)
+
+    def test_dict_view_matches_resource_rows(self, session):
+        _make_resources(session)
+        es = EconomySystem(session)
+        view = es.global_market_prices
+        food = session.query(Resource).filter_by(resource_type=ResourceType.FOOD).one()
+        assert view[ResourceType.FOOD]["base_price"] == food.base_value
+        assert view[ResourceType.FOOD]["current_price"] == food.base_value
+        assert view[ResourceType.FOOD]["volatility"] == pytest.approx(0.2)
+        assert view[ResourceType.FOOD]["supply"] == 0
+
+    def test_update_stays_within_volatility_band(self, session):
+        _make_resources(session)
+        es = EconomySystem(session)
+        for _ in range(20):
+            es._update_global_market()
+            # price_change is uniform(-0.1, 0.1) scaled by volatility 0.2
+            assert np.all(es._market_current >= es._market_base * 0.98 - 1e-9)
+            assert np.all(es._market_current <= es._market_base * 1.02 + 1e-9)
+
+    def test_fluctuation_reproducible_under_seed(self, session):
+        _make_resources(session)
+        prices = []
+        for _ in range(2):
+            random.seed(99)
+            es = EconomySystem(session)
+            es._update_global_market()
+            prices.append(es._market_current.copy())
+        np.testing.assert_array_equal(prices[0], prices[1])
+
+    def test_empty_market(self, session):
+        es = EconomySystem(session)
+        es._update_global_market()
+        assert es.global_market_prices == {}
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestUpdateDynastyEconomy:
+    """Verify the per-turn economy update."""
+
+    def test_dormant_dynasty_fast_path(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session, wealth=750)
+        es = EconomySystem(session)
+        result = es.update_dynasty_economy(dynasty.id)
+        assert result["success"] is True
+        assert result["economy_data"]["trade_routes"] == []
+        assert result["economy_data"]["treasury_change"] == 0
+        session.refresh(dynasty)
+        assert dynasty.current_wealth == 750
+
+    def test_reuses_territory_figures_from_dynasty_economy(self, session, monkeypatch):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        es = EconomySystem(session)
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("territory figures recomputed")
+
+        monkeypatch.setattr(es, "calculate_territory_production", _fail)
+        monkeypatch.setattr(es, "calculate_territory_consumption", _fail)
+        result = es.update_dynasty_economy(dynasty.id)
+        assert result["success"] is True
+
+    def test_calculate_keeps_no_instance_state(self, session):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        es = EconomySystem(session)
+        before = {name: len(value) for name, value in vars(es).items() if isinstance(value, dict)}
+        es.calculate_dynasty_economy(dynasty.id)
+        after = {name: len(value) for name, value in vars(es).items() if isinstance(value, dict)}
+        assert after == before
+
+    def test_ages_resources_and_buildings(self, session):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        session.query(TerritoryResource).first().current_depletion = 0.99
+        session.query(Building).first().condition = 0.02
+        session.commit()
+        before = {tr.id: tr.current_depletion for tr in session.query(TerritoryResource).all()}
+        conditions = {b.id: b.condition for b in session.query(Building).all()}
+        EconomySystem(session).update_dynasty_economy(dynasty.id)
+        for tr in session.query(TerritoryResource).all():
+            assert tr.current_depletion == pytest.approx(min(1.0, before[tr.id] + tr.depletion_rate))
+        for building in session.query(Building).all():
+            assert building.condition == pytest.approx(max(0, conditions[building.id] - 0.05))
+
+    def test_query_count_independent_of_territory_count(self, session):
+        small = _make_dynasty_with_territories(session, 2)
+        large = _make_dynasty_with_territories(session, 6, name='Large Dynasty')
+        es = EconomySystem(session)
+        session.expire_all()
+        with _count_queries(session) as small_queries:
+            es.update_dynasty_economy(small.id)
+        session.expire_all()
+        with _count_queries(session) as large_queries:
+            es.update_dynasty_economy(large.id)
+        assert len(large_queries) == len(small_queries)
+
+    def test_population_growth_follows_food_supply(self, session):
+        dynasty = _make_dynasty_with_territories(session, 3)
+        es = EconomySystem(session)
+        economy = es.calculate_dynasty_economy(dynasty.id)
+        expected = {}
+        for data in economy["territories"]:
+            rate = es.population_growth_rates[data["development_level"]]
+            food_production = data["production"].get(ResourceType.FOOD, 0)
+            food_consumption = data["consumption"].get(ResourceType.FOOD, 0)
+            if food_production < food_consumption:
+                rate *= food_production / food_consumption - 0.5
+            expected[data["id"]] = max(100, int(data["population"] * (1 + rate)))
+        es.update_dynasty_economy(dynasty.id)
+        for territory in session.query(Territory).filter_by(controller_dynasty_id=dynasty.id):
+            assert territory.population == expected[territory.id]
+
+    def test_growth_kernel_shortage_and_floor(self):
+        growth_by_level = np.array([0.01, 0.01, 0.012], dtype=np.float64)
+        populations = economy_module._growth_kernel(
+            np.array([1000.0, 1000.0, 100.0, 1000.0]),
+            np.array([1, 2, 1, 42]),
+            np.array([5.0, 1.0, 0.0, 0.0]),
+            np.array([1.0, 4.0, 3.0, 0.0]),
+            growth_by_level,
+        )
+        # Surplus, 25% fed, starving but floored, unknown level at 1%
+        assert populations.tolist() == [1010, 997, 100, 1010]
+
+    def test_unlisted_level_zero_gets_default_rate(self, session):
+        es = EconomySystem(session)
+        levels = np.array([0, 1, 42])
+        growth = economy_module._rate_by_level(es._growth_by_level, levels, 0.01)
+        tax = economy_module._rate_by_level(es._tax_rate_by_level, levels, 0.05)
+        assert 0 not in es.population_growth_rates and 0 not in es.base_tax_rates
+        assert growth.tolist() == [0.01, es.population_growth_rates[1], 0.01]
+        assert tax.tolist() == [0.05, es.base_tax_rates[1], 0.05]
+
+    def test_trade_profit_jitters_own_side_only(self, session):
+        _make_resources(session)
+        _, home = _make_user_and_dynasty(session, name='Home')
+        _, partner = _make_user_and_dynasty(session, name='Partner')
+        export = TradeRoute(source_dynasty_id=home.id, target_dynasty_id=partner.id,
+                            resource_type=ResourceType.WINE, resource_amount=5,
+                            profit_source=10.0, profit_target=10.0)
+        imported = TradeRoute(source_dynasty_id=partner.id, target_dynasty_id=home.id,
+                              resource_type=ResourceType.IRON, resource_amount=5,
+                              profit_source=10.0, profit_target=10.0)
+        session.add_all([export, imported])
+        session.commit()
+        EconomySystem(session).update_dynasty_economy(home.id)
+        assert 9.0 <= export.profit_source <= 11.0 and export.profit_source != 10.0
+        assert export.profit_target == 10.0
+        assert imported.profit_source == 10.0
+        assert 9.0 <= imported.profit_target <= 11.0 and imported.profit_target != 10.0
+
+    def test_trade_profit_jitter_visible_inside_batch(self, session):
+        _make_resources(session)
+        _, home = _make_user_and_dynasty(session, name='Home')
+        _, partner = _make_user_and_dynasty(session, name='Partner')
+        export = TradeRoute(source_dynasty_id=home.id, target_dynasty_id=partner.id,
+                            resource_type=ResourceType.WINE, resource_amount=5,
+                            profit_source=10.0, profit_target=10.0)
+        session.add(export)
+        session.commit()
+        assert export.profit_source == 10.0
+        es = EconomySystem(session)
+        with es.batch():
+            es.update_dynasty_economy(home.id)
+            # Flushed, not committed, yet the loaded route sees the new profit
+            assert export.profit_source != 10.0
+            stored = session.query(TradeRoute.profit_source).filter_by(id=export.id).scalar()
+            assert export.profit_source == stored
+
+    def test_unknown_dynasty(self, session):
+        es = EconomySystem(session)
+        result = es.update_dynasty_economy(999)
+        assert result["success"] is False
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestGetMarketPrice:
+    """Verify O(1) market price lookup."""
+
+    def test_known_resource(self, session):
+        _make_resources(session)
+        es = EconomySystem(session)
+        assert es.get_market_price(ResourceType.GOLD) == \
+            es.global_market_prices[ResourceType.GOLD]["current_price"]
+
+    def test_tracks_market_updates(self, session):
+        _make_resources(session)
+        es = EconomySystem(session)
+        es._update_global_market()
+        i = es._market_index[ResourceType.SILK]
+        assert es.get_market_price(ResourceType.SILK) == es._market_current[i]
+
+    def test_unknown_resource_returns_default(self, session):
+        es = EconomySystem(session)
+        assert es.get_market_price(ResourceType.WINE) is None
+        assert es.get_market_price(ResourceType.WINE, 7) == 7
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestCalculateDynastyEconomy:
+    """Verify the bulk-loaded dynasty economy."""
+
+    def test_matches_per_territory_calculations(self, session):
+        dynasty = _make_dynasty_with_territories(session, 3)
+        es = EconomySystem(session)
+        economy = es.calculate_dynasty_economy(dynasty.id)
+        assert len(economy["territories"]) == 3
+        for entry in economy["territories"]:
+            assert entry["production"] == pytest.approx(es.calculate_territory_production(entry["id"]))
+            assert entry["consumption"] == pytest.approx(es.calculate_territory_consumption(entry["id"]))
+            assert entry["tax_income"] == pytest.approx(es.calculate_territory_tax_income(entry["id"]))
+
+    def test_totals_are_sums_of_territories(self, session):
+        dynasty = _make_dynasty_with_territories(session, 3)
+        economy = EconomySystem(session).calculate_dynasty_economy(dynasty.id)
+        for key in ("total_production", "total_consumption"):
+            field = "production" if key == "total_production" else "consumption"
+            expected = {}
+            for entry in economy["territories"]:
+                for resource_type, amount in entry[field].items():
+                    expected[resource_type] = expected.get(resource_type, 0) + amount
+            assert economy[key] == pytest.approx(expected)
+        for resource_type, amount in economy["net_production"].items():
+            assert amount == pytest.approx(
+                economy["total_production"].get(resource_type, 0)
+                - economy["total_consumption"].get(resource_type, 0)
+            )
+
+    def test_building_maintenance_kept_apart_from_unit_gold(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        economy = EconomySystem(session).calculate_dynasty_economy(dynasty.id)
+        consumption = economy["total_consumption"]
+        # Farm (5) + market (12) maintenance under the plain "gold" key;
+        # the archers' upkeep under ResourceType.GOLD
+        assert consumption["gold"] == 17
+        assert consumption[ResourceType.GOLD] == 4
+        assert economy["treasury_change"] == pytest.approx(economy["total_income"] - 4)
+
+    def test_trade_partners_named_with_one_query(self, session):
+        _make_resources(session)
+        _, home = _make_user_and_dynasty(session, name='Home')
+        partners = [_make_user_and_dynasty(session, name=f'Partner {i}')[1] for i in range(3)]
+        for i, partner in enumerate(partners):
+            source, target = (home, partner) if i % 2 == 0 else (partner, home)
+            session.add(TradeRoute(source_dynasty_id=source.id, target_dynasty_id=target.id,
+                                   resource_type=ResourceType.WINE, resource_amount=5,
+                                   profit_source=3.0, profit_target=2.0))
+        session.commit()
+        es = EconomySystem(session)
+        session.expire_all()
+        with _count_queries(session) as queries:
+            economy = es.calculate_dynasty_economy(home.id)
+        assert sorted((route["partner"], route["type"]) for route in economy["trade_routes"]) == [
+            ("Partner 0", "export"), ("Partner 1", "import"), ("Partner 2", "export")
+        ]
+        assert len([q for q in queries if "FROM dynasty" in q]) == 2
+
+    def test_detail_is_optional(self, session):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        es = EconomySystem(session)
+        detailed = es.calculate_dynasty_economy(dynasty.id)
+        summary = es.calculate_dynasty_economy(dynasty.id, include_detail=False)
+        assert len(detailed.pop("territories")) == 2
+        assert "territories" not in summary
+        assert summary == detailed
+
+    def test_query_count_independent_of_territory_count(self, session):
+        small = _make_dynasty_with_territories(session, 2)
+        large = _make_dynasty_with_territories(session, 6, name='Large Dynasty')
+        es = EconomySystem(session)
+        session.expire_all()
+        with _count_queries(session) as small_queries:
+            es.calculate_dynasty_economy(small.id)
+        session.expire_all()
+        with _count_queries(session) as large_queries:
+            es.calculate_dynasty_economy(large.id)
+        assert len(large_queries) == len(small_queries)
+
+    def test_aggregate_kernel(self):
+        production = np.array([[1.0, 2.0], [3.0, 0.0]])
+        production_present = np.array([[True, True], [True, False]])
+        consumption = np.array([[0.5, 0.0, 1.0], [0.5, 0.0, 2.0]])
+        consumption_present = np.array([[True, False, True], [False, False, True]])
+        (total_production, production_mask, total_consumption, consumption_mask,
+         net, net_mask) = economy_module._aggregate_kernel(
+            production, production_present, consumption, consumption_present
+        )
+        assert total_production.tolist() == [4.0, 2.0]
+        assert production_mask.tolist() == [True, True]
+        assert total_consumption.tolist() == [1.0, 0.0, 3.0]
+        assert consumption_mask.tolist() == [True, False, True]
+        assert net.tolist() == [3.0, 2.0, -3.0]
+        assert net_mask.tolist() == [True, True, True]
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestTerritoryProduction:
+    """Verify production computed from the terrain/building lookup tables."""
+
+    def test_terrain_base_scaled_by_development(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session)
+        territory = _make_territory(session, dynasty, dev_level=3, terrain=TerrainType.HILLS)
+        production = EconomySystem(session).calculate_territory_production(territory.id)
+        assert production == pytest.approx({
+            ResourceType.FOOD: 0.7 * 3,
+            ResourceType.STONE: 1.5 * 3,
+            ResourceType.IRON: 1.2 * 3,
+        })
+
+    def test_building_bonus_only_for_existing_production(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session)
+        territory = _make_territory(session, dynasty, terrain=TerrainType.PLAINS)
+        session.add(Building(territory_id=territory.id, building_type=BuildingType.MINE,
+                             name="Mine", construction_year=1290, condition=1.0))
+        session.commit()
+        production = EconomySystem(session).calculate_territory_production(territory.id)
+        # Mine boosts GOLD (0.8) but plains produce no iron or stone
+        assert ResourceType.IRON not in production
+        assert ResourceType.STONE not in production
+        assert production[ResourceType.GOLD] == pytest.approx(0.3 * 0.8)
+
+    def test_poor_condition_building_gives_no_bonus(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session)
+        territory = _make_territory(session, dynasty, terrain=TerrainType.PLAINS)
+        session.add(Building(territory_id=territory.id, building_type=BuildingType.FARM,
+                             name="Farm", construction_year=1290, condition=0.4))
+        session.commit()
+        production = EconomySystem(session).calculate_territory_production(territory.id)
+        assert production[ResourceType.FOOD] == pytest.approx(2.0)
+
+    def test_depleted_resource_still_reported(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session)
+        territory = _make_territory(session, dynasty, terrain=TerrainType.PLAINS)
+        wine = session.query(Resource).filter_by(resource_type=ResourceType.WINE).one()
+        session.add(TerritoryResource(territory_id=territory.id, resource_id=wine.id,
+                                      base_production=5.0, current_depletion=1.0))
+        session.commit()
+        production = EconomySystem(session).calculate_territory_production(territory.id)
+        assert production[ResourceType.WINE] == 0
+
+    def test_population_and_governor_modifiers(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session)
+        governor = PersonDB(dynasty_id=dynasty.id, name="Gov", surname=dynasty.name,
+                            gender="MALE", birth_year=1270, stewardship_skill=20)
+        session.add(governor)
+        session.commit()
+        territory = _make_territory(session, dynasty, terrain=TerrainType.PLAINS, population=500)
+        territory.governor_id = governor.id
+        session.commit()
+        production = EconomySystem(session).calculate_territory_production(territory.id)
+        assert production[ResourceType.FOOD] == pytest.approx(2.0 * 0.5 * 1.2)
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestTaxIncome:
+    """Verify settlements fold into a single tax multiplier."""
+
+    def test_settlement_multipliers_compound(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session)
+        bare = _make_territory(session, dynasty)
+        settled = _make_territory(session, dynasty)
+        for settlement_type in ("city", "town", "city", "village"):
+            session.add(Settlement(territory_id=settled.id, name=settlement_type.title(),
+                                   settlement_type=settlement_type))
+        session.commit()
+        es = EconomySystem(session)
+        assert es._settlement_multipliers([bare.id, settled.id]) == {
+            settled.id: pytest.approx(1.5 * 1.5 * 1.2)
+        }
+        assert es.calculate_territory_tax_income(settled.id) == pytest.approx(
+            es.calculate_territory_tax_income(bare.id) * 1.5 * 1.5 * 1.2
+        )
+
+
+    def test_tax_rules_across_a_dynasty(self, session):
+        dynasty = _make_dynasty_with_territories(session, 4)
+        extra = _make_territory(session, dynasty, dev_level=12, population=3500)
+        extra.base_tax = 3
+        session.commit()
+        es = EconomySystem(session)
+        economy = es.calculate_dynasty_economy(dynasty.id)
+        for data in economy["territories"]:
+            territory = session.get(Territory, data["id"])
+            expected = territory.base_tax * territory.development_level
+            expected *= min(2.0, territory.population / 1000)
+            expected *= es.base_tax_rates.get(territory.development_level, 0.05)
+            if territory.governor_id:
+                expected *= 1.0 + session.get(PersonDB, territory.governor_id).stewardship_skill * 0.02
+            expected *= es._settlement_multipliers([territory.id]).get(territory.id, 1.0)
+            assert data["tax_income"] == pytest.approx(expected)
+            assert es.calculate_territory_tax_income(territory.id) == pytest.approx(expected)
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestSetTaxPolicy:
+    """Verify set_tax_policy reports its outcome."""
+
+    def test_valid_modifier(self, session):
+        _, dynasty = _make_user_and_dynasty(session)
+        assert EconomySystem(session).set_tax_policy(dynasty.id, 1.2) == (
+            True, "Set tax policy to 120% of normal"
+        )
+
+    def test_out_of_range_modifier(self, session):
+        _, dynasty = _make_user_and_dynasty(session)
+        success, _ = EconomySystem(session).set_tax_policy(dynasty.id, 2.0)
+        assert success is False
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestBuildingMutations:
+    """Verify the building and territory mutations load their rows together."""
+
+    @pytest.fixture
+    def worn_building(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        dynasty.current_wealth = 10_000
+        session.commit()
+        building = session.query(Building).filter_by(building_type=BuildingType.MARKET).one()
+        return dynasty, building
+
+    def test_repair_loads_building_chain_in_one_query(self, session, worn_building):
+        dynasty, building = worn_building
+        building_id = building.id
+        es = EconomySystem(session)
+        session.expunge_all()
+        with _count_queries(session) as queries:
+            success, message = es.repair_building(building_id)
+        assert success is True
+        assert message == "Repaired Market"
+        # The joined load, then the refresh of the expired building for the message
+        assert len(queries) == 2
+        assert session.get(Building, building_id).condition == 1.0
+
+    def test_bulk_repair(self, session, monkeypatch):
+        dynasty = _make_dynasty_with_territories(session, 3)
+        markets = session.query(Building).filter_by(building_type=BuildingType.MARKET).order_by(Building.id).all()
+        farm = session.query(Building).filter_by(building_type=BuildingType.FARM).first()
+        es = EconomySystem(session)
+        cost = es._repair_cost(BuildingType.MARKET, 0.3)
+        dynasty.current_wealth = 2 * cost + 1
+        session.commit()
+        commits = []
+        real_commit = session.commit
+        monkeypatch.setattr(session, "commit", lambda: commits.append(1) or real_commit())
+        results = es.bulk_repair([markets[0].id, farm.id, markets[1].id, markets[0].id, markets[2].id, 9999])
+        assert results == [
+            (True, "Repaired Market"),
+            (False, "Building doesn't need repair"),
+            (True, "Repaired Market"),
+            (False, "Building doesn't need repair"),
+            (False, "Not enough gold"),
+            (False, "Building not found"),
+        ]
+        assert len(commits) == 1
+        assert [session.get(Building, market.id).condition for market in markets] == [1.0, 1.0, 0.3]
+        session.refresh(dynasty)
+        assert dynasty.current_wealth == pytest.approx(1)
+
+    def test_upgrade_and_develop(self, session, worn_building):
+        dynasty, building = worn_building
+        es = EconomySystem(session)
+        assert es.upgrade_building(building.id) == (True, "Upgraded Market to level 2")
+        territory = building.territory
+        assert es.develop_territory(territory.id)[0] is True
+        assert territory.development_level == 2
+        session.refresh(dynasty)
+        assert dynasty.current_wealth < 10_000
+
+    def test_development_cost_per_level(self, session, worn_building):
+        dynasty, building = worn_building
+        territory = building.territory
+        territory.development_level = 9
+        dynasty.current_wealth = 549
+        session.commit()
+        es = EconomySystem(session)
+        assert es.develop_territory(territory.id) == (
+            False, "Not enough gold. Required: 550.0, Available: 549"
+        )
+        dynasty.current_wealth = 550
+        session.commit()
+        assert es.develop_territory(territory.id)[0] is True
+        assert dynasty.current_wealth == 0
+        assert es.develop_territory(territory.id) == (
+            False, "Territory is already at maximum development level"
+        )
+
+    def test_no_expire_on_commit_restores_setting(self, session):
+        with economy_module.no_expire_on_commit(session):
+            assert session().expire_on_commit is False
+        assert session().expire_on_commit is True
+
+    def test_missing_rows(self, session, worn_building):
+        _, building = worn_building
+        es = EconomySystem(session)
+        assert es.repair_building(9999) == (False, "Building not found")
+        building.territory.controller_dynasty_id = None
+        session.commit()
+        assert es.repair_building(building.id) == (False, "Controlling dynasty not found")
+        assert es.develop_territory(building.territory_id) == (False, "Territory has no controller")
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestEconomySummary:
+    """Verify economy totals are memoized until a mutation changes them."""
+
+    def test_reused_within_a_year(self, session, monkeypatch):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        es = EconomySystem(session)
+        first = es.integrate_with_military_system(dynasty.id)
+        monkeypatch.setattr(es, "_compute_dynasty_economy",
+                            lambda *args, **kwargs: pytest.fail("economy recomputed"))
+        assert es.integrate_with_military_system(dynasty.id) == first
+
+    def test_net_production_vector_matches_totals(self, session):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        es = EconomySystem(session)
+        net_production = es._economy_summary(dynasty.id)["net_production"]
+        vector = es._net_production_vector(dynasty.id)
+        for i, key in enumerate(es._consumption_keys):
+            if key in net_production:
+                assert vector[i] == pytest.approx(net_production[key])
+            else:
+                assert np.isnan(vector[i])
+
+    def test_trade_route_checks_net_production(self, session):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        _, partner = _make_user_and_dynasty(session, name='Partner')
+        es = EconomySystem(session)
+        vector = es._net_production_vector(dynasty.id)
+        produced = [rt for rt in ResourceType if vector[economy_module._RESOURCE_INDEX[rt]] > 0]
+        missing = [rt for rt in ResourceType if np.isnan(vector[economy_module._RESOURCE_INDEX[rt]])]
+        assert produced and missing
+        surplus = vector[economy_module._RESOURCE_INDEX[produced[0]]]
+        assert es.establish_trade_route(dynasty.id, partner.id, missing[0], 0)[0] is False
+        assert es.establish_trade_route(dynasty.id, partner.id, produced[0], surplus * 2)[0] is False
+        assert es.establish_trade_route(dynasty.id, partner.id, produced[0], surplus / 2)[0] is True
+
+    def test_recomputed_after_development_and_new_year(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        dynasty.current_wealth = 10_000
+        session.commit()
+        territory = session.query(Territory).filter_by(controller_dynasty_id=dynasty.id).one()
+        es = EconomySystem(session)
+        before = es._economy_summary(dynasty.id)
+        es.develop_territory(territory.id)
+        developed = es._economy_summary(dynasty.id)
+        assert developed is not before
+        assert developed["tax_income"] > before["tax_income"]
+        dynasty.current_simulation_year += 1
+        session.commit()
+        assert es._economy_summary(dynasty.id) is not developed
+
+    def test_maintenance_check_sees_units_recruited_elsewhere(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        dynasty.current_wealth = 10_000
+        dynasty.current_iron = dynasty.current_timber = 1_000
+        session.commit()
+        territory = session.query(Territory).filter_by(controller_dynasty_id=dynasty.id).one()
+        es = EconomySystem(session)
+        before = es.integrate_with_military_system(dynasty.id)
+        success, _, unit = MilitarySystem(session).recruit_unit(dynasty.id, UnitType.ARCHERS, 100, territory.id)
+        assert success is True
+        after = es.integrate_with_military_system(dynasty.id)
+        assert after["total_gold_maintenance"] == before["total_gold_maintenance"] + unit.maintenance_cost
+        assert after["food_consumption"] == pytest.approx(before["food_consumption"] + unit.food_consumption)
+
+    def test_recomputed_after_conquest_elsewhere(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        es = EconomySystem(session)
+        before = es._economy_summary(dynasty.id)
+        # Ownership changes outside EconomySystem, with the treasury untouched
+        _make_territory(session, dynasty, name='Conquered')
+        after = es._economy_summary(dynasty.id)
+        assert after is not before
+        assert after["tax_income"] > before["tax_income"]
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestTradeRouteWarCheck:
+    """Verify trade routes are refused between dynasties at war."""
+
+    @pytest.fixture
+    def belligerents(self, session):
+        _make_resources(session)
+        _, attacker = _make_user_and_dynasty(session, name='Attacker')
+        _, defender = _make_user_and_dynasty(session, name='Defender')
+        _, neutral = _make_user_and_dynasty(session, name='Neutral')
+        session.add(War(attacker_dynasty_id=attacker.id, defender_dynasty_id=defender.id,
+                        war_goal=WarGoal.CONQUEST, start_year=1300))
+        session.commit()
+        return attacker, defender, neutral
+
+    def test_refused_in_both_directions(self, session, belligerents):
+        attacker, defender, neutral = belligerents
+        es = EconomySystem(session)
+        for source, target in ((attacker, defender), (defender, attacker)):
+            success, message, _ = es.establish_trade_route(source.id, target.id, ResourceType.WINE, 1)
+            assert success is False
+            assert message == "Cannot establish trade routes with enemies during war"
+        _, message, _ = es.establish_trade_route(attacker.id, neutral.id, ResourceType.WINE, 1)
+        assert message != "Cannot establish trade routes with enemies during war"
+
+    def test_wars_loaded_once_per_batch(self, session, belligerents):
+        attacker, defender, neutral = belligerents
+        es = EconomySystem(session)
+        with _count_queries(session) as queries:
+            with es.batch():
+                es.establish_trade_route(attacker.id, defender.id, ResourceType.WINE, 1)
+                es.establish_trade_route(defender.id, neutral.id, ResourceType.WINE, 1)
+        assert len([q for q in queries if "FROM war" in q]) == 1
+        assert es._war_pairs is None
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestBulkTradeRoutes:
+    """Verify bulk_establish_trade_routes validates each route and commits once."""
+
+    def test_valid_routes_inserted_with_one_commit(self, session, monkeypatch):
+        exporter = _make_dynasty_with_territories(session, 2)
+        _, partner = _make_user_and_dynasty(session, name='Partner')
+        _, enemy = _make_user_and_dynasty(session, name='Enemy')
+        session.add(War(attacker_dynasty_id=exporter.id, defender_dynasty_id=enemy.id,
+                        war_goal=WarGoal.CONQUEST, start_year=1300))
+        session.commit()
+        es = EconomySystem(session)
+        vector = es._net_production_vector(exporter.id)
+        produced = next(rt for rt in ResourceType if vector[economy_module._RESOURCE_INDEX[rt]] > 0)
+        missing = next(rt for rt in ResourceType if np.isnan(vector[economy_module._RESOURCE_INDEX[rt]]))
+        commits = []
+        real_commit = session.commit
+        monkeypatch.setattr(session, "commit", lambda: commits.append(1) or real_commit())
+        results = es.bulk_establish_trade_routes([
+            (exporter.id, partner.id, produced, 1),
+            (exporter.id, enemy.id, produced, 1),
+            (exporter.id, partner.id, missing, 1),
+            (exporter.id, partner.id, produced, 2),
+        ])
+        assert [success for success, _, _ in results] == [True, False, False, True]
+        assert results[1][1] == "Cannot establish trade routes with enemies during war"
+        assert results[1][2] is None
+        assert len(commits) == 1
+        assert all(route.id is not None for success, _, route in results if success)
+        assert session.query(TradeRoute).filter_by(source_dynasty_id=exporter.id).count() == 2
+
+    def test_empty(self, session):
+        assert EconomySystem(session).bulk_establish_trade_routes([]) == []
+
+    def test_base_price_read_from_market(self, session):
+        exporter = _make_dynasty_with_territories(session, 1)
+        _, partner = _make_user_and_dynasty(session, name='Partner')
+        es = EconomySystem(session)
+        vector = es._net_production_vector(exporter.id)
+        produced = next(rt for rt in ResourceType if vector[economy_module._RESOURCE_INDEX[rt]] > 0)
+        with _count_queries(session) as queries:
+            _, _, route = es.establish_trade_route(exporter.id, partner.id, produced, 1)
+        assert not [q for q in queries if "FROM resource" in q]
+        base_value = session.query(Resource.base_value).filter_by(resource_type=produced).scalar()
+        assert route.base_price == base_value
+        assert route.profit_source == pytest.approx(base_value * 0.8)
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestMilitaryIntegration:
+    """Verify integrate_with_military_system's maintenance totals."""
+
+    def test_maintenance_summed_in_database(self, session):
+        dynasty = _make_dynasty_with_territories(session, 3)
+        result = EconomySystem(session).integrate_with_military_system(dynasty.id)
+        assert result["total_gold_maintenance"] == 12
+        assert result["total_food_maintenance"] == pytest.approx(4.5)
+
+    def test_units_listed_as_dicts(self, session):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        result = EconomySystem(session).integrate_with_military_system(dynasty.id)
+        assert len(result["military_units"]) == 2
+        assert sum(unit["maintenance_cost"] for unit in result["military_units"]) == result["total_gold_maintenance"]
+        assert all(isinstance(unit, dict) for unit in result["military_units"])
+
+    def test_no_units(self, session):
+        _make_resources(session)
+        _, dynasty = _make_user_and_dynasty(session)
+        result = EconomySystem(session).integrate_with_military_system(dynasty.id)
+        assert result["total_gold_maintenance"] == 0
+        assert result["total_food_maintenance"] == 0
+        assert result["can_afford_maintenance"] is True
+        assert result["military_units"] == []
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestCharacterIntegration:
+    """Verify integrate_with_character_system's governor lookups."""
+
+    def test_governor_effects(self, session):
+        dynasty = _make_dynasty_with_territories(session, 3)
+        result = EconomySystem(session).integrate_with_character_system(dynasty.id)
+        assert len(result["governor_effects"]) == 2
+        for effects in result["governor_effects"].values():
+            assert effects["stewardship_skill"] == 10
+            assert effects["tax_bonus"] == pytest.approx(0.2)
+
+    def _appoint_outside_governors(self, session, dynasty):
+        """Give every territory its own governor from another dynasty."""
+        _, lender = _make_user_and_dynasty(session, name=f'{dynasty.name} Lender')
+        for territory in session.query(Territory).filter_by(controller_dynasty_id=dynasty.id):
+            governor = PersonDB(dynasty_id=lender.id, name="Gov", surname=lender.name,
+                                gender="MALE", birth_year=1270, stewardship_skill=5)
+            session.add(governor)
+            session.flush()
+            territory.governor_id = governor.id
+        session.commit()
+
+    def test_query_count_independent_of_territory_count(self, session):
+        small = _make_dynasty_with_territories(session, 2)
+        large = _make_dynasty_with_territories(session, 6, name='Large Dynasty')
+        self._appoint_outside_governors(session, small)
+        self._appoint_outside_governors(session, large)
+        es = EconomySystem(session)
+        session.expire_all()
+        with _count_queries(session) as small_queries:
+            es.integrate_with_character_system(small.id)
+        session.expire_all()
+        with _count_queries(session) as large_queries:
+            es.integrate_with_character_system(large.id)
+        assert len(large_queries) == len(small_queries)
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestMapIntegration:
+    """Verify integrate_with_map_system loads each territory row set once."""
+
+    def test_matches_territory_calculations(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        territory = session.query(Territory).filter_by(controller_dynasty_id=dynasty.id).one()
+        es = EconomySystem(session)
+        result = es.integrate_with_map_system(territory.id)
+        assert result["production"] == es.calculate_territory_production(territory.id)
+        assert result["consumption"] == es.calculate_territory_consumption(territory.id)
+        assert [tr.territory_id for tr in result["resources"]] == [territory.id]
+        assert sorted(b.name for b in result["buildings"]) == ["Farm", "Market"]
+
+    def test_each_table_queried_once(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        territory_id = session.query(Territory.id).filter_by(controller_dynasty_id=dynasty.id).scalar()
+        es = EconomySystem(session)
+        session.expire_all()
+        with _count_queries(session) as queries:
+            es.integrate_with_map_system(territory_id)
+        for table in ("territory_resource", "building", "military_unit"):
+            assert len([q for q in queries if f"FROM {table}" in q]) == 1
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestDiplomacyIntegration:
+    """Verify treaty lookups for integrate_with_diplomacy_system."""
+
+    def _dynasty_with_treaties(self, session, n_partners, name):
+        _, home = _make_user_and_dynasty(session, name=name)
+        for i in range(n_partners):
+            _, partner = _make_user_and_dynasty(session, name=f'{name} Partner {i}')
+            relation = DiplomaticRelation(dynasty1_id=home.id, dynasty2_id=partner.id)
+            session.add(relation)
+            session.commit()
+            session.add(Treaty(diplomatic_relation_id=relation.id, treaty_type=TreatyType.TRADE_AGREEMENT,
+                               start_year=1300, active=True))
+            session.add(Treaty(diplomatic_relation_id=relation.id, treaty_type=TreatyType.ECONOMIC_UNION,
+                               start_year=1300, active=False))
+        session.commit()
+        return home
+
+    def test_only_active_treaties_count(self, session):
+        home = self._dynasty_with_treaties(session, 2, 'Home')
+        result = EconomySystem(session).integrate_with_diplomacy_system(home.id)
+        assert [t.treaty_type for t in result["treaties"]] == [TreatyType.TRADE_AGREEMENT] * 2
+        assert result["treaty_effects"] == {"trade_efficiency": pytest.approx(1.2)}
+
+    def test_treaty_effects_combine(self, session):
+        _, home = _make_user_and_dynasty(session, name='Allied')
+        for i, treaty_type in enumerate((TreatyType.TRADE_AGREEMENT, TreatyType.ECONOMIC_UNION,
+                                         TreatyType.MARKET_ACCESS, TreatyType.NON_AGGRESSION)):
+            _, partner = _make_user_and_dynasty(session, name=f'Ally {i}')
+            relation = DiplomaticRelation(dynasty1_id=home.id, dynasty2_id=partner.id)
+            session.add(relation)
+            session.commit()
+            session.add(Treaty(diplomatic_relation_id=relation.id, treaty_type=treaty_type,
+                               start_year=1300, active=True))
+        session.commit()
+        result = EconomySystem(session).integrate_with_diplomacy_system(home.id)
+        assert result["treaty_effects"] == {
+            "trade_efficiency": pytest.approx(1.3),
+            "market_access": True,
+            "resource_exchange": True,
+        }
+
+    def test_trade_income_takes_each_side_profit(self, session):
+        home = self._dynasty_with_treaties(session, 2, 'Traders')
+        partners = session.query(DiplomaticRelation.dynasty2_id).filter_by(dynasty1_id=home.id).all()
+        (first,), (second,) = partners
+        session.add_all([
+            TradeRoute(source_dynasty_id=home.id, target_dynasty_id=first, resource_type=ResourceType.WINE,
+                       resource_amount=5, profit_source=10.0, profit_target=4.0),
+            TradeRoute(source_dynasty_id=second, target_dynasty_id=home.id, resource_type=ResourceType.IRON,
+                       resource_amount=5, profit_source=7.0, profit_target=3.0),
+            TradeRoute(source_dynasty_id=home.id, target_dynasty_id=second, resource_type=ResourceType.SILK,
+                       resource_amount=5, profit_source=100.0, profit_target=100.0, is_active=False),
+        ])
+        session.commit()
+        es = EconomySystem(session)
+        result = es.integrate_with_diplomacy_system(home.id)
+        assert result["trade_income"] == pytest.approx(13.0)
+        assert sorted(route["profit_source"] for route in result["trade_routes"]) == [7.0, 10.0]
+        assert es.integrate_with_diplomacy_system(first)["trade_income"] == pytest.approx(4.0)
+
+    def test_query_count_independent_of_relation_count(self, session):
+        small = self._dynasty_with_treaties(session, 1, 'Small')
+        large = self._dynasty_with_treaties(session, 4, 'Large')
+        es = EconomySystem(session)
+        session.expire_all()
+        with _count_queries(session) as small_queries:
+            es.integrate_with_diplomacy_system(small.id)
+        session.expire_all()
+        with _count_queries(session) as large_queries:
+            es.integrate_with_diplomacy_system(large.id)
+        assert len(large_queries) == len(small_queries)
+        # Treaties are joined to their relations rather than looked up by ID
+        assert len([q for q in large_queries if "FROM treaty" in q]) == 1
+        assert not [q for q in large_queries if "FROM diplomatic_relation" in q]
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestBatch:
+    """Verify batch() groups mutations into one commit."""
+
+    def test_mutations_commit_once(self, session, monkeypatch):
+        dynasty = _make_dynasty_with_territories(session, 2)
+        dynasty.current_wealth = 10_000
+        session.commit()
+        territories = session.query(Territory).filter_by(controller_dynasty_id=dynasty.id).all()
+        es = EconomySystem(session)
+        commits = []
+        real_commit = session.commit
+        monkeypatch.setattr(session, "commit", lambda: commits.append(1) or real_commit())
+        with es.batch():
+            for territory in territories:
+                assert es.develop_territory(territory.id)[0] is True
+            assert commits == []
+        assert len(commits) == 1
+        assert [t.development_level for t in territories] == [2, 3]
+
+    def test_error_rolls_back_whole_batch(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        dynasty.current_wealth = 10_000
+        session.commit()
+        territory = session.query(Territory).filter_by(controller_dynasty_id=dynasty.id).one()
+        es = EconomySystem(session)
+        with pytest.raises(RuntimeError):
+            with es.batch():
+                es.develop_territory(territory.id)
+                raise RuntimeError("abort")
+        session.refresh(territory)
+        assert territory.development_level == 1
+        assert es._batch_depth == 0
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestLookupTables:
+    """Verify the cached array forms of the economy tables."""
+
+    def test_tables_shared_between_instances(self, session):
+        first = EconomySystem(session)
+        second = EconomySystem(session)
+        assert first._terrain_prod is second._terrain_prod
+        assert first._building_bonus is second._building_bonus
+        assert first._resource_index is economy_module._RESOURCE_INDEX
+        assert not first._terrain_prod.flags.writeable
+
+    def test_resource_bonus_view_drops_other_effects(self, session):
+        es = EconomySystem(session)
+        assert es._building_resource_bonuses[BuildingType.MARKET] == {ResourceType.GOLD: 1.5}
+        assert es._building_resource_bonuses[BuildingType.ROADS] == {}
+        market_i = es._building_index[BuildingType.MARKET]
+        assert es._building_bonus[market_i, es._resource_index[ResourceType.GOLD]] == 1.5
+        assert np.count_nonzero(es._building_bonus[market_i] != 1.0) == 1
+
+    def test_terrain_efficiency_normalized(self, session):
+        dynasty = _make_dynasty_with_territories(session, 1)
+        territory = session.query(Territory).filter_by(controller_dynasty_id=dynasty.id).one()
+        es = EconomySystem(session)
+        efficiency = es.integrate_with_map_system(territory.id)["terrain_efficiency"]
+        assert efficiency == {
+            resource_type: rate / 2.0
+            for resource_type, rate in es.terrain_production_rates[territory.terrain_type].items()
+        }
+        assert efficiency is EconomySystem(session)._terrain_efficiency[territory.terrain_type]
+
+    def test_effects_json_precomputed_per_building_type(self, session):
+        es = EconomySystem(session)
+        farm_effects = json.loads(es._effects_json_by_type[BuildingType.FARM])
+        assert farm_effects[ResourceType.FOOD.value] == es.building_production_bonuses[BuildingType.FARM][ResourceType.FOOD]
+        assert set(farm_effects) == {resource_type.value for resource_type in ResourceType}
+        assert set(es._effects_json_by_type) == set(BuildingType)
+
+    def test_effects_json_for_matches_tables(self, session):
+        es = EconomySystem(session)
+        for building_type in BuildingType:
+            assert effects_json_for(building_type) == es._effects_json_by_type[building_type]
+        assert effects_json_for(BuildingType.FARM) is effects_json_for(BuildingType.FARM)
+
+    def test_changed_table_gets_its_own_arrays(self, session):
+        es = EconomySystem(session)
+        shared = es._terrain_prod
+        es.terrain_production_rates[TerrainType.PLAINS][ResourceType.FOOD] = 9.0
+        es._build_lookup_tables()
+        assert es._terrain_prod is not shared
+        food_i = es._resource_index[ResourceType.FOOD]
+        assert es._terrain_prod[es._terrain_index[TerrainType.PLAINS], food_i] == 9.0
+        assert shared[es._terrain_index[TerrainType.PLAINS], food_i] == 2.0
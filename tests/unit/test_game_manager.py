@@ -1,7 +1,16 @@
 # tests/unit/test_game_manager.py
+import datetime
+import random
+import re
+from unittest.mock import patch
+
 import pytest
+from sqlalchemy import event
+
 from models.game_manager import GameManager
-from models.db_models import DynastyDB, User, PersonDB
+from models.db_models import (
+    DynastyDB, User, PersonDB, DiplomaticRelation, Territory, HistoryLogEntryDB, War, WarGoal
+)
 
 
 @pytest.mark.unit
@@ -17,6 +26,7 @@ class TestGameManager:
         assert hasattr(game_manager, 'game_state_cache')
         assert 'data' in game_manager.game_state_cache
         assert 'ttl' in game_manager.game_state_cache
+        assert 'versions' in game_manager.game_state_cache
         assert 'invalidation_keys' in game_manager.game_state_cache
 
     def test_create_dynasty(self, game_manager, session, app):
@@ -39,6 +49,132 @@ class TestGameManager:
             assert dynasty is not None
             assert dynasty.user_id == user.id
 
+    def test_create_game_assigns_territories_and_capitals(self, game_manager, session, app):
+        """Test that create_new_game() gives every dynasty its territories and one capital."""
+        with app.app_context():
+            user = User(username="testuser_gm6", email="gm6@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, _ = game_manager.create_new_game(user_id=user.id, game_name="Map Game")
+            assert success is True, f"create_new_game failed: {message}"
+
+            session.expire_all()
+            assert session.query(Territory).filter_by(controller_dynasty_id=None).count() == 0
+            for dynasty in session.query(DynastyDB).filter_by(user_id=user.id).all():
+                owned = session.query(Territory).filter_by(controller_dynasty_id=dynasty.id).all()
+                assert owned
+                capitals = [t.id for t in owned if t.is_capital]
+                assert capitals == [dynasty.capital_territory_id]
+
+    def test_create_game_links_founding_couples(self, game_manager, session, app):
+        """Test that create_new_game() links each founder and spouse and logs the founding."""
+        with app.app_context():
+            user = User(username="testuser_gm7", email="gm7@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, _ = game_manager.create_new_game(user_id=user.id, game_name="Founders")
+            assert success is True, f"create_new_game failed: {message}"
+
+            session.expire_all()
+            for dynasty in session.query(DynastyDB).filter_by(user_id=user.id).all():
+                founder = session.query(PersonDB).filter_by(dynasty_id=dynasty.id, is_monarch=True).one()
+                if founder.spouse_sim_id is not None:
+                    spouse = session.get(PersonDB, founder.spouse_sim_id)
+                    assert spouse.dynasty_id == dynasty.id
+                    assert spouse.spouse_sim_id == founder.id
+                log = session.query(HistoryLogEntryDB).filter_by(
+                    dynasty_id=dynasty.id, event_type="dynasty_founding").one()
+                assert log.person1_sim_id == founder.id
+                if dynasty.is_ai_controlled:
+                    assert dynasty.ai_personality in game_manager.ai_controllers
+
+    def test_create_game_skips_dynasty_whose_founder_fails(self, game_manager, session, app, monkeypatch):
+        """Test that create_new_game() skips a dynasty whose founding rows fail to flush."""
+        with app.app_context():
+            user = User(username="testuser_gm13", email="gm13@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            initialize_founder = game_manager._initialize_dynasty_founder
+            broken = []
+
+            def initialize_with_bad_row(dynasty_id, start_year):
+                couple = initialize_founder(dynasty_id, start_year)
+                if not broken:
+                    # A person without a name violates NOT NULL when flushed
+                    broken.append(dynasty_id)
+                    session.add(PersonDB(dynasty_id=dynasty_id, name=None, surname="Broken",
+                                         gender="MALE", birth_year=start_year - 30))
+                return couple
+
+            monkeypatch.setattr(game_manager, "_initialize_dynasty_founder", initialize_with_bad_row)
+            success, message, _ = game_manager.create_new_game(user_id=user.id, game_name="Bad Founder")
+            assert success is True, f"create_new_game failed: {message}"
+
+            session.expire_all()
+            dynasties = session.query(DynastyDB).filter_by(user_id=user.id).all()
+            assert len(dynasties) > 1
+            for dynasty in dynasties:
+                people = session.query(PersonDB).filter_by(dynasty_id=dynasty.id).count()
+                if dynasty.id in broken:
+                    assert people == 0
+                else:
+                    assert session.query(PersonDB).filter_by(dynasty_id=dynasty.id, is_monarch=True).count() == 1
+
+    def test_create_game_fills_territory_shortage(self, game_manager, session, app):
+        """Test that create_new_game() creates emergency territories when the map is too small."""
+        with app.app_context():
+            user = User(username="testuser_gm8", email="gm8@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            # The first game provides the provinces emergency territories are placed in
+            success, message, _ = game_manager.create_new_game(user_id=user.id, game_name="Map")
+            assert success is True, f"create_new_game failed: {message}"
+
+            with patch.object(game_manager.map_system['generator'], 'generate_predefined_map',
+                              return_value={'territories': []}):
+                success, message, dynasty_id = game_manager.create_new_game(
+                    user_id=user.id, game_name="Shortage", ai_dynasties=2)
+            assert success is True, f"create_new_game failed: {message}"
+
+            emergency = session.query(Territory).filter(
+                Territory.name.like("Emergency Territory%")).all()
+            assert len(emergency) == 3
+            assert sorted(t.controller_dynasty_id for t in emergency) == sorted(
+                [dynasty_id] + [d.id for d in session.query(DynastyDB).filter(
+                    DynastyDB.user_id == user.id, DynastyDB.id > dynasty_id).all()])
+            assert all(t.is_capital for t in emergency)
+
+    def test_second_game_leaves_earlier_ai_dynasties_alone(self, game_manager, session, app):
+        """Test that create_new_game() only sets up the AI dynasties it just created."""
+        with app.app_context():
+            user = User(username="testuser_gm4", email="gm4@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, _ = game_manager.create_new_game(user_id=user.id, game_name="First")
+            assert success is True, f"create_new_game failed: {message}"
+            first_ai = session.query(DynastyDB).filter_by(user_id=user.id, is_ai_controlled=True).all()
+            first_counts = {
+                d.id: session.query(PersonDB).filter_by(dynasty_id=d.id).count() for d in first_ai
+            }
+
+            success, message, _ = game_manager.create_new_game(user_id=user.id, game_name="Second")
+            assert success is True, f"create_new_game failed: {message}"
+
+            for dynasty_id, count in first_counts.items():
+                assert session.query(PersonDB).filter_by(dynasty_id=dynasty_id).count() == count
+            assert session.query(DynastyDB).filter_by(
+                user_id=user.id, is_ai_controlled=True).count() == 2 * len(first_ai)
+
     def test_load_game(self, game_manager, session, app):
         """Test that load_game() returns a dict with dynasty info."""
         with app.app_context():
@@ -59,6 +195,172 @@ class TestGameManager:
             assert 'dynasty' in game_state
             assert game_state['dynasty']['id'] == dynasty_id
 
+    def test_load_game_relations_single_query(self, game_manager, session, app):
+        """Test that load_game() lists relations without a query per relation."""
+        with app.app_context():
+            user = User(username="testuser_gm5", email="gm5@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, dynasty_id = game_manager.create_new_game(
+                user_id=user.id,
+                game_name="Relations Game",
+            )
+            assert success is True, f"create_new_game failed: {message}"
+            others = session.query(DynastyDB).filter(DynastyDB.id != dynasty_id).all()
+            scores = [80, -60, 10]
+            for other, score in zip(others, scores):
+                low, high = sorted((dynasty_id, other.id))
+                session.add(DiplomaticRelation(dynasty1_id=low, dynasty2_id=high, relation_score=score))
+            # A relation between two other dynasties is not listed
+            session.add(DiplomaticRelation(dynasty1_id=others[0].id, dynasty2_id=others[1].id,
+                                           relation_score=50))
+            session.commit()
+
+            statements = []
+
+            def _before(conn, cursor, statement, parameters, context, executemany):
+                if "diplomatic_relation" in statement:
+                    statements.append(statement)
+
+            engine = session.get_bind()
+            event.listen(engine, "before_cursor_execute", _before)
+            try:
+                game_state = game_manager.load_game(dynasty_id)
+            finally:
+                event.remove(engine, "before_cursor_execute", _before)
+
+            assert len(statements) == 1
+            relations = game_state['diplomacy']['relations']
+            assert [(r['dynasty_id'], r['dynasty_name'], r['status'], r['score']) for r in relations] == [
+                (other.id, other.name, status, score)
+                for other, score, status in zip(others, scores, ["Allied", "Hostile", "Neutral"])
+            ]
+
+    def test_load_game_wars_name_opponents(self, game_manager, session, app):
+        """Test that load_game() names each war's opponent without a lookup per war."""
+        with app.app_context():
+            user = User(username="testuser_gm9", email="gm9@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, dynasty_id = game_manager.create_new_game(
+                user_id=user.id,
+                game_name="War Game",
+            )
+            assert success is True, f"create_new_game failed: {message}"
+            others = session.query(DynastyDB).filter(DynastyDB.id != dynasty_id).all()
+            session.add_all([
+                War(attacker_dynasty_id=dynasty_id, defender_dynasty_id=others[0].id,
+                    war_goal=WarGoal.CONQUEST, start_year=1000),
+                War(attacker_dynasty_id=others[1].id, defender_dynasty_id=dynasty_id,
+                    war_goal=WarGoal.CONQUEST, start_year=1001),
+                War(attacker_dynasty_id=dynasty_id, defender_dynasty_id=others[2].id,
+                    war_goal=WarGoal.CONQUEST, start_year=990, end_year=995),
+            ])
+            session.commit()
+            session.expire_all()
+
+            statements = []
+
+            def _before(conn, cursor, statement, parameters, context, executemany):
+                if re.search(r"FROM dynasty\s+WHERE dynasty\.id = \?", statement):
+                    statements.append(statement)
+
+            engine = session.get_bind()
+            event.listen(engine, "before_cursor_execute", _before)
+            try:
+                game_state = game_manager.load_game(dynasty_id)
+            finally:
+                event.remove(engine, "before_cursor_execute", _before)
+
+            wars = sorted(game_state['wars'], key=lambda w: w['started'])
+            assert [(w['against'], w['is_attacker']) for w in wars] == [
+                (others[0].name, True), (others[1].name, False)
+            ]
+            # Only the dynasty itself is selected on its own; opponents come with the wars
+            assert len(statements) == 1
+
+    def test_load_game_cache_follows_versions(self, game_manager, session, app):
+        """Test that load_game() reuses its cache until a turn bumps the dynasty's version."""
+        with app.app_context():
+            user = User(username="testuser_gm10", email="gm10@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, dynasty_id = game_manager.create_new_game(
+                user_id=user.id,
+                game_name="Cache Game",
+            )
+            assert success is True, f"create_new_game failed: {message}"
+            rival = session.query(DynastyDB).filter(DynastyDB.id != dynasty_id).first()
+            low, high = sorted((dynasty_id, rival.id))
+            session.add(DiplomaticRelation(dynasty1_id=low, dynasty2_id=high, relation_score=10))
+            session.commit()
+
+            state = game_manager.load_game(dynasty_id)
+            assert game_manager.load_game(dynasty_id) is state
+
+            # A turn for the related rival outdates this dynasty's cached state,
+            # even though the rival itself was never cached
+            success, msg, _ = game_manager.process_turn(rival.id)
+            assert success is True, f"process_turn failed: {msg}"
+            assert game_manager._get_cached_state(dynasty_id) is None
+            assert game_manager.load_game(dynasty_id) is not state
+
+    def test_cached_state_expires_after_ttl(self, game_manager, session, app):
+        """Test that a cached state is dropped once older than the TTL, even if its version is current."""
+        with app.app_context():
+            user = User(username="testuser_gm11", email="gm11@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, dynasty_id = game_manager.create_new_game(
+                user_id=user.id,
+                game_name="TTL Game",
+            )
+            assert success is True, f"create_new_game failed: {message}"
+
+            state = game_manager.load_game(dynasty_id)
+            entry = game_manager.game_state_cache['data'][dynasty_id]
+            entry['last_updated'] -= datetime.timedelta(seconds=game_manager.game_state_cache['ttl'])
+            assert game_manager._get_cached_state(dynasty_id) is None
+            assert game_manager.load_game(dynasty_id) is not state
+
+    def test_ai_diplomacy_outdates_target_cache(self, game_manager, session, app, monkeypatch):
+        """Test that an AI diplomatic action outdates the cached state of the dynasty it targets."""
+        with app.app_context():
+            user = User(username="testuser_gm12", email="gm12@example.com")
+            user.set_password("password123")
+            session.add(user)
+            session.commit()
+
+            success, message, dynasty_id = game_manager.create_new_game(
+                user_id=user.id,
+                game_name="AI Diplomacy Cache Game",
+            )
+            assert success is True, f"create_new_game failed: {message}"
+            ai_dynasty = session.query(DynastyDB).filter(DynastyDB.id != dynasty_id).first()
+
+            state = game_manager.load_game(dynasty_id)
+            assert game_manager._get_cached_state(dynasty_id) is not None
+
+            # Aim the AI at the player's dynasty and let the action succeed
+            monkeypatch.setattr(game_manager, "_get_related_dynasties", lambda _id: [dynasty_id])
+            monkeypatch.setattr(random, "random", lambda: 0.0)
+            monkeypatch.setattr(game_manager.diplomacy_system, "perform_diplomatic_action",
+                                lambda **kwargs: (True, "ok"))
+            monkeypatch.setattr(game_manager.diplomacy_system, "create_treaty",
+                                lambda **kwargs: (False, "declined", None))
+            game_manager._make_diplomacy_decision(ai_dynasty.id, risk_tolerance=0.5)
+
+            assert game_manager._get_cached_state(dynasty_id) is None
+            assert game_manager.load_game(dynasty_id) is not state
+
     def test_process_turn(self, game_manager, session, app):
         """Test that process_turn() runs without error for an existing dynasty."""
         with app.app_context():
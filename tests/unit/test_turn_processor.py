@@ -0,0 +1,194 @@
+"""Tests for the yearly lifecycle helpers in models/turn_processor.py.
+
+Covers:
+- yearly death chances come from a per-theme table that follows the age curve,
+  with traits parsed once per distinct traits_json
+- childbirth checks read children counts gathered once per turn
+- stranger spouses and rival clans redraw a surname equal to the dynasty's name
+- succession candidates sort by a per-rule key chosen once
+"""
+import uuid
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from models.db_models import DynastyDB, PersonDB, User
+from models import turn_processor as tp
+
+
+def _make_dynasty(session, name='Test Dynasty', year=1300):
+    suffix = uuid.uuid4().hex[:8]
+    user = User(username=f"u_{suffix}", email=f"{suffix}@x.test")
+    user.set_password("password123")
+    session.add(user)
+    session.commit()
+    dynasty = DynastyDB(user_id=user.id, name=name, theme_identifier_or_json="medieval_europe",
+                        start_year=year, current_simulation_year=year, current_wealth=500)
+    session.add(dynasty)
+    session.commit()
+    return dynasty
+
+
+def _make_couple(session, dynasty, n_children=0):
+    """A married couple with ``n_children`` children; returns the wife."""
+    wife = PersonDB(dynasty_id=dynasty.id, name="Wife", surname=dynasty.name, gender="FEMALE",
+                    birth_year=1275)
+    husband = PersonDB(dynasty_id=dynasty.id, name="Husband", surname=dynasty.name, gender="MALE",
+                       birth_year=1270)
+    session.add_all([wife, husband])
+    session.flush()
+    wife.spouse_sim_id = husband.id
+    husband.spouse_sim_id = wife.id
+    for i in range(n_children):
+        session.add(PersonDB(dynasty_id=dynasty.id, name=f"Child {i}", surname=dynasty.name,
+                             gender="MALE", birth_year=1295, mother_sim_id=wife.id,
+                             father_sim_id=husband.id))
+    session.commit()
+    return wife
+
+
+@contextmanager
+def _count_queries(session):
+    """Collect SELECT statements issued on the session's engine."""
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+@pytest.mark.unit
+class TestMortalityTable:
+    """Verify _mortality_by_age and its use in process_death_check."""
+
+    def test_age_curve(self):
+        chances = tp._mortality_by_age(1.0, 1.0, False)
+        assert chances[0] == pytest.approx(0.15)
+        assert chances[30] == pytest.approx(0.01)
+        assert chances[70] == pytest.approx(0.05)
+        assert chances[80] == pytest.approx(0.20)
+        assert chances[85] == pytest.approx(0.20)
+        # Past the themed max age death is certain
+        assert chances[-1] == 1.0
+        assert len(chances) == 87
+
+    def test_theme_factors_and_sickly(self):
+        chances = tp._mortality_by_age(2.0, 0.5, True)
+        # Sickly halves the max age (85 * 0.5 * 0.5 = 21.25) and doubles mortality
+        assert chances[0] == pytest.approx(0.6)
+        assert chances[21] == pytest.approx(0.02)
+        assert chances[-1] == 1.0
+        assert len(chances) == 23
+
+    def test_table_shared_per_theme(self):
+        assert tp._mortality_by_age(1.0, 1.0, False) is tp._mortality_by_age(1.0, 1.0, False)
+
+    def test_trait_set_parsed_once(self):
+        traits = tp._trait_set('["Sickly", "Brave"]')
+        assert traits == frozenset({"Sickly", "Brave"})
+        assert tp._trait_set('["Sickly", "Brave"]') is traits
+        assert tp._trait_set(None) == frozenset()
+        assert tp._trait_list('["Sickly", "Brave"]') is tp._trait_list('["Sickly", "Brave"]')
+        assert tp._trait_list(None) == ()
+
+    def test_death_check_reads_table(self):
+        person = PersonDB(name="Ada", surname="Test", gender="FEMALE", birth_year=1200,
+                          traits_json='["Sickly"]')
+        theme_config = {"mortality_factor": 1.0, "max_age_factor": 1.0}
+        # Age 30, Sickly: 2% chance
+        with patch.object(tp.random, "random", return_value=0.021):
+            assert tp.process_death_check(person, 1230, theme_config) is False
+        assert person.death_year is None
+
+
+@pytest.mark.unit
+@pytest.mark.model
+class TestChildCounts:
+    """Verify process_childbirth_check can use counts gathered up front."""
+
+    def test_count_children(self, session):
+        dynasty = _make_dynasty(session)
+        wife = _make_couple(session, dynasty, n_children=3)
+        childless = _make_couple(session, dynasty)
+        counts = tp._count_children([wife.id, wife.spouse_sim_id, childless.id])
+        assert counts == {wife.id: 3, wife.spouse_sim_id: 3, childless.id: 0}
+        assert tp._count_children([]) == {}
+
+    def test_counts_replace_per_woman_query(self, session):
+        dynasty = _make_dynasty(session)
+        wife = _make_couple(session, dynasty, n_children=8)
+        child_counts = tp._count_children([wife.id])
+        with _count_queries(session) as queries:
+            assert tp.process_childbirth_check(dynasty, wife, 1300, {}, child_counts) is False
+        assert not [q for q in queries if "count(" in q.lower()]
+
+    def test_birth_increments_count(self, session):
+        dynasty = _make_dynasty(session)
+        wife = _make_couple(session, dynasty, n_children=2)
+        child_counts = tp._count_children([wife.id])
+        with patch.object(tp.random, "random", return_value=0.0):
+            assert tp.process_childbirth_check(dynasty, wife, 1300, {}, child_counts) is True
+        assert child_counts[wife.id] == 3
+        assert tp._count_children([wife.id]) == child_counts
+
+
+@pytest.mark.unit
+class TestOtherSurname:
+    """Verify the surname drawn for stranger spouses and rival clans."""
+
+    def test_never_draws_dynasty_name(self):
+        surnames = ["Valois", "Capet", "Plantagenet"]
+        tp.random.seed(3)
+        drawn = {tp._other_surname(surnames, "Capet", "Rivals") for _ in range(50)}
+        assert drawn == {"Valois", "Plantagenet"}
+
+    def test_falls_back_to_filtered_pool(self):
+        # Mostly clashing pool: redraws give up, the filtered pool still answers
+        surnames = ["Capet"] * 99 + ["Valois"]
+        tp.random.seed(3)
+        assert tp._other_surname(surnames, "Capet", "Rivals") == "Valois"
+
+    def test_fallback_without_other_surnames(self):
+        assert tp._other_surname(["Capet"], "Capet", "Rivals") == "Rivals"
+        assert tp._other_surname(["Capet", "Capet"], "Capet", "OtherHouse") == "OtherHouse"
+
+
+@pytest.mark.unit
+class TestSuccessionSort:
+    """Verify _sort_by_rule orders candidates per succession rule."""
+
+    def _people(self):
+        return [
+            PersonDB(name="Anna", gender="FEMALE", birth_year=1270, traits_json='["Brave", "Wise"]'),
+            PersonDB(name="Bert", gender="MALE", birth_year=1275, traits_json='["Brave"]'),
+            PersonDB(name="Carl", gender="MALE", birth_year=1272, traits_json='[]'),
+        ]
+
+    @pytest.mark.parametrize("rule, expected", [
+        ("PRIMOGENITURE_MALE_PREFERENCE", ["Carl", "Bert", "Anna"]),
+        ("PRIMOGENITURE_ABSOLUTE", ["Anna", "Carl", "Bert"]),
+        ("ELECTIVE_NOBLE_COUNCIL", ["Anna", "Bert", "Carl"]),
+        ("UNKNOWN_RULE", ["Anna", "Bert", "Carl"]),
+    ])
+    def test_rule_order(self, rule, expected):
+        people = self._people()
+        tp._sort_by_rule(people, rule)
+        assert [p.name for p in people] == expected
+
+    def test_elective_counts_duplicate_traits(self):
+        # Same as len(person.get_traits()), duplicates included
+        people = [
+            PersonDB(name="Dora", gender="FEMALE", birth_year=1270, traits_json='["Wise", "Bold"]'),
+            PersonDB(name="Emil", gender="MALE", birth_year=1275, traits_json='["Brave", "Brave", "Wise"]'),
+        ]
+        tp._sort_by_rule(people, "ELECTIVE_NOBLE_COUNCIL")
+        assert [p.name for p in people] == ["Emil", "Dora"]
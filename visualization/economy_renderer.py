@@ -97,8 +97,8 @@ class EconomyRenderer:
         net_production = economy_data.get("net_production", {})
         
         # Prepare data for plotting
-        resources = list(set(list(production.keys()) + list(consumption.keys())))
-        resources.sort(key=lambda x: x.value if hasattr(x, 'value') else str(x))
+        resources = sorted(production.keys() | consumption.keys(),
+                           key=lambda x: x.value if hasattr(x, 'value') else str(x))
         
         resource_names = [r.value if hasattr(r, 'value') else str(r) for r in resources]
         production_values = [production.get(r, 0) for r in resources]
@@ -268,8 +268,9 @@ class EconomyRenderer:
         
         # Get current values from global market
         for resource in resources:
-            market_data = self.economy_system.global_market_prices.get(resource.resource_type, {})
-            current_values.append(market_data.get("current_price", resource.base_value))
+            current_values.append(
+                self.economy_system.get_market_price(resource.resource_type, resource.base_value)
+            )
         
         # Set up bar positions
         x = np.arange(len(resources))
@@ -329,8 +330,8 @@ class EconomyRenderer:
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 8))
         
         # Plot 1: Production and Consumption
-        resources = list(set(list(production.keys()) + list(consumption.keys())))
-        resources.sort(key=lambda x: x.value if hasattr(x, 'value') else str(x))
+        resources = sorted(production.keys() | consumption.keys(),
+                           key=lambda x: x.value if hasattr(x, 'value') else str(x))
         
         resource_names = [r.value if hasattr(r, 'value') else str(r) for r in resources]
         production_values = [production.get(r, 0) for r in resources]